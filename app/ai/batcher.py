@@ -0,0 +1,132 @@
+"""Micro-batching scheduler for LangChain chain invocations."""
+
+import asyncio
+import functools
+import logging
+from typing import Any, Dict, List, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+_Pending = List[Tuple[dict, asyncio.Future]]
+
+
+class ChainBatcher:
+    """
+    Coalesce concurrent invocations of the same chain into one batch call.
+
+    A request for a chain with no call in flight is dispatched straight away
+    via ``chain.ainvoke``, so an idle server adds no latency. Requests that
+    arrive while a call for the same chain is outstanding are queued and
+    dispatched together via ``chain.abatch`` once that call finishes, after
+    at most ``max_wait_seconds``, or as soon as the queue reaches
+    ``max_batch_size``. A queued batch of one still goes through ``ainvoke``.
+
+    Chains returned by the cached ``create_*_chain`` factories are shared per
+    (template, model, temperature), so the chain object itself is the batch key.
+    """
+
+    def __init__(self, max_batch_size: int = 32, max_wait_seconds: float = 0.02):
+        self._max_batch_size = max_batch_size
+        self._max_wait_seconds = max_wait_seconds
+        # Maps chain to its queued requests and the timer that flushes them
+        self._pending: Dict[Any, Tuple[_Pending, asyncio.TimerHandle]] = {}
+        # Number of dispatches running per chain
+        self._in_flight: Dict[Any, int] = {}
+        # The loop only keeps weak references to tasks, so hold them here
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, chain: Any, payload: dict) -> dict:
+        """
+        Queue a payload for the given chain and wait for its result.
+
+        Args:
+            chain: The chain to invoke
+            payload: Input variables for the chain
+
+        Returns:
+            The chain output for this payload
+
+        Raises:
+            Exception: Whatever the underlying chain raised for this payload
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        if chain not in self._in_flight and chain not in self._pending:
+            # Nothing to coalesce with, so don't make the request wait
+            self._start(chain, [(payload, future)])
+            return await future
+
+        entry = self._pending.get(chain)
+        if entry is None:
+            timer = loop.call_later(self._max_wait_seconds, self._flush, chain)
+            entry = self._pending[chain] = ([], timer)
+        pending = entry[0]
+        pending.append((payload, future))
+
+        if len(pending) >= self._max_batch_size:
+            self._flush(chain)
+
+        return await future
+
+    def _flush(self, chain: Any) -> None:
+        """Detach the pending batch for a chain and dispatch it."""
+        entry = self._pending.pop(chain, None)
+        if entry is None:
+            return
+
+        pending, timer = entry
+        # An early flush must not leave the timer to pop the next batch
+        timer.cancel()
+        self._start(chain, pending)
+
+    def _start(self, chain: Any, pending: _Pending) -> None:
+        """Run a batch in the background, tracking it as in flight."""
+        self._in_flight[chain] = self._in_flight.get(chain, 0) + 1
+        task = asyncio.create_task(self._dispatch(chain, pending))
+        self._tasks.add(task)
+        task.add_done_callback(functools.partial(self._finish, chain, pending))
+
+    def _finish(self, chain: Any, pending: _Pending, task: asyncio.Task) -> None:
+        """Untrack a finished batch and send anything queued behind it."""
+        self._tasks.discard(task)
+
+        # A cancelled batch (e.g. on shutdown, possibly before it even
+        # started) resolved nothing, so don't leave its callers hanging
+        for _, future in pending:
+            if not future.done():
+                future.cancel()
+
+        remaining = self._in_flight[chain] - 1
+        if remaining:
+            self._in_flight[chain] = remaining
+        else:
+            del self._in_flight[chain]
+
+        # Requests queued behind this call need not wait out their timer
+        self._flush(chain)
+
+    async def _dispatch(self, chain: Any, pending: _Pending) -> None:
+        """Run one batch and resolve each caller's future."""
+        payloads = [payload for payload, _ in pending]
+
+        try:
+            if len(payloads) == 1:
+                results = [await chain.ainvoke(payloads[0])]
+            else:
+                logger.debug("Dispatching batch of %d chain calls", len(payloads))
+                results = await chain.abatch(payloads, return_exceptions=True)
+        except Exception as e:
+            results = [e] * len(pending)
+
+        for (_, future), result in zip(pending, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+# Shared batcher used by the AI endpoints
+batcher = ChainBatcher()
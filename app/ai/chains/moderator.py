@@ -1,8 +1,9 @@
 """Content moderation chain using LangChain."""
 
-import json
 import logging
+from functools import lru_cache
 
+import orjson
 from langchain_classic.chains import LLMChain
 from langchain_core.prompts import PromptTemplate
 from langchain_openai import ChatOpenAI
@@ -11,13 +12,52 @@ from app.ai.prompts.templates import MODERATION_TEMPLATE
 
 logger = logging.getLogger(__name__)
 
+_MODERATION_PROMPT = PromptTemplate(
+    input_variables=["content"],
+    template=MODERATION_TEMPLATE,
+)
 
+# Structured-output schema so the model always returns well-formed JSON
+MODERATION_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "moderation",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "risk_score": {"type": "number"},
+                "reason_tags": {
+                    "type": "array",
+                    "items": {
+                        "type": "string",
+                        "enum": [
+                            "spam",
+                            "harassment",
+                            "hate_speech",
+                            "explicit",
+                            "violence",
+                            "misinformation",
+                            "off_topic",
+                        ],
+                    },
+                },
+                "explanation": {"type": "string"},
+            },
+            "required": ["risk_score", "reason_tags", "explanation"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+
+@lru_cache(maxsize=32)
 def create_moderation_chain(
     model: str = "gpt-4o-mini",
     temperature: float = 0.2,
 ) -> LLMChain:
     """
-    Factory function to create a content moderation chain.
+    Factory function to create a content moderation chain (cached per model/temperature).
 
     Args:
         model: OpenAI model to use
@@ -26,17 +66,13 @@ def create_moderation_chain(
     Returns:
         LLMChain configured for content moderation
     """
-    prompt = PromptTemplate(
-        input_variables=["content"],
-        template=MODERATION_TEMPLATE,
-    )
-
     llm = ChatOpenAI(
         model=model,
         temperature=temperature,
+        model_kwargs={"response_format": MODERATION_RESPONSE_FORMAT},
     )
 
-    return LLMChain(llm=llm, prompt=prompt)
+    return LLMChain(llm=llm, prompt=_MODERATION_PROMPT)
 
 
 def parse_moderation_result(result: str) -> dict:
@@ -53,16 +89,11 @@ def parse_moderation_result(result: str) -> dict:
         ValueError: If result cannot be parsed
     """
     try:
-        # Try to extract JSON from the result
-        # Sometimes the AI includes extra text before/after the JSON
-        start = result.find("{")
-        end = result.rfind("}") + 1
-        
-        if start == -1 or end == 0:
-            raise ValueError("No JSON object found in result")
+        # The chain requests JSON-schema output, so the result is pure JSON
+        parsed = orjson.loads(result)
         
-        json_str = result[start:end]
-        parsed = json.loads(json_str)
+        if not isinstance(parsed, dict):
+            raise ValueError("Result is not a JSON object")
         
         # Validate required fields
         if "risk_score" not in parsed:
@@ -84,6 +115,6 @@ def parse_moderation_result(result: str) -> dict:
         
         return parsed
         
-    except (json.JSONDecodeError, ValueError) as e:
+    except (orjson.JSONDecodeError, ValueError) as e:
         logger.error(f"Failed to parse moderation result: {e}")
         raise ValueError(f"Failed to parse moderation result: {str(e)}")
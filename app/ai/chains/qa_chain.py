@@ -1,18 +1,26 @@
 """Question-answering chain using LangChain."""
 
+from functools import lru_cache
+
 from langchain_classic.chains import LLMChain
 from langchain_core.prompts import PromptTemplate
 from langchain_openai import ChatOpenAI
 
 from app.ai.prompts.templates import QA_TEMPLATE
 
+_QA_PROMPT = PromptTemplate(
+    input_variables=["context", "question"],
+    template=QA_TEMPLATE,
+)
+
 
+@lru_cache(maxsize=32)
 def create_qa_chain(
     model: str = "gpt-4o-mini",
     temperature: float = 0.2,
 ) -> LLMChain:
     """
-    Factory function to create a Q&A chain.
+    Factory function to create a Q&A chain (cached per model/temperature).
 
     Args:
         model: OpenAI model to use
@@ -21,14 +29,9 @@ def create_qa_chain(
     Returns:
         LLMChain configured for Q&A
     """
-    prompt = PromptTemplate(
-        input_variables=["context", "question"],
-        template=QA_TEMPLATE,
-    )
-
     llm = ChatOpenAI(
         model=model,
         temperature=temperature,
     )
 
-    return LLMChain(llm=llm, prompt=prompt)
+    return LLMChain(llm=llm, prompt=_QA_PROMPT)
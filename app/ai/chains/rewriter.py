@@ -1,6 +1,7 @@
 """Text rewriting chain using LangChain."""
 
 from enum import Enum
+from functools import lru_cache
 
 from langchain_classic.chains import LLMChain
 from langchain_core.prompts import PromptTemplate
@@ -14,6 +15,24 @@ from app.ai.prompts.templates import (
 )
 
 
+_CLARITY_PROMPT = PromptTemplate(
+    input_variables=["text"],
+    template=REWRITE_CLARITY_TEMPLATE,
+)
+_SHORTEN_PROMPT = PromptTemplate(
+    input_variables=["text"],
+    template=REWRITE_SHORTEN_TEMPLATE,
+)
+_POLITE_PROMPT = PromptTemplate(
+    input_variables=["text"],
+    template=REWRITE_POLITE_TEMPLATE,
+)
+_TRANSLATE_PROMPT = PromptTemplate(
+    input_variables=["text", "target_language"],
+    template=REWRITE_TRANSLATE_TEMPLATE,
+)
+
+
 class RewriteMode(str, Enum):
     """Supported rewrite modes."""
 
@@ -23,18 +42,29 @@ class RewriteMode(str, Enum):
     TRANSLATE = "translate"
 
 
+# Prompt to use for each rewrite mode
+_REWRITE_PROMPTS: dict[RewriteMode, PromptTemplate] = {
+    RewriteMode.CLARITY: _CLARITY_PROMPT,
+    RewriteMode.SHORTEN: _SHORTEN_PROMPT,
+    RewriteMode.POLITE: _POLITE_PROMPT,
+    RewriteMode.TRANSLATE: _TRANSLATE_PROMPT,
+}
+
+
+@lru_cache(maxsize=32)
 def create_rewrite_chain(
     mode: RewriteMode,
-    target_language: str = "Korean",
     model: str = "gpt-4o-mini",
     temperature: float = 0.3,
 ) -> LLMChain:
     """
     Factory function to create a text rewriting chain.
 
+    Chains are cached per (mode, model, temperature). For translate mode the
+    target language is an input variable, so pass it in the chain input.
+
     Args:
         mode: The rewriting mode to use
-        target_language: Target language for translation mode (default: Korean)
         model: OpenAI model to use
         temperature: Sampling temperature (lower = more deterministic)
 
@@ -44,27 +74,12 @@ def create_rewrite_chain(
     Raises:
         ValueError: If an unsupported mode is provided
     """
-    # Select template and input variables based on mode
-    if mode == RewriteMode.CLARITY:
-        template = REWRITE_CLARITY_TEMPLATE
-        input_variables = ["text"]
-    elif mode == RewriteMode.SHORTEN:
-        template = REWRITE_SHORTEN_TEMPLATE
-        input_variables = ["text"]
-    elif mode == RewriteMode.POLITE:
-        template = REWRITE_POLITE_TEMPLATE
-        input_variables = ["text"]
-    elif mode == RewriteMode.TRANSLATE:
-        template = REWRITE_TRANSLATE_TEMPLATE
-        input_variables = ["text", "target_language"]
-    else:
+    # Select the prebuilt prompt based on mode
+    try:
+        prompt = _REWRITE_PROMPTS[mode]
+    except KeyError:
         raise ValueError(f"Unsupported rewrite mode: {mode}")
 
-    prompt = PromptTemplate(
-        input_variables=input_variables,
-        template=template,
-    )
-
     llm = ChatOpenAI(
         model=model,
         temperature=temperature,
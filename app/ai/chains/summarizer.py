@@ -1,12 +1,20 @@
 """Thread summarization chain using LangChain."""
 
+from functools import lru_cache
+
 from langchain_classic.chains import LLMChain
 from langchain_core.prompts import PromptTemplate
 from langchain_openai import ChatOpenAI
 
 from app.ai.prompts.templates import SUMMARIZER_TEMPLATE
 
+_SUMMARIZER_PROMPT = PromptTemplate(
+    input_variables=["thread_content"],
+    template=SUMMARIZER_TEMPLATE,
+)
+
 
+@lru_cache(maxsize=32)
 def create_summarizer_chain(
     model: str = "gpt-4o-mini",
     temperature: float = 0.3,
@@ -14,6 +22,9 @@ def create_summarizer_chain(
     """
     Factory function to create a thread summarization chain.
 
+    Chains are cached per argument combination, so repeated calls share
+    the same prompt and ChatOpenAI client.
+
     Args:
         model: OpenAI model to use
         temperature: Sampling temperature (lower = more deterministic)
@@ -21,14 +32,9 @@ def create_summarizer_chain(
     Returns:
         LLMChain configured for summarization
     """
-    prompt = PromptTemplate(
-        input_variables=["thread_content"],
-        template=SUMMARIZER_TEMPLATE,
-    )
-
     llm = ChatOpenAI(
         model=model,
         temperature=temperature,
     )
 
-    return LLMChain(llm=llm, prompt=prompt)
+    return LLMChain(llm=llm, prompt=_SUMMARIZER_PROMPT)
@@ -71,9 +71,11 @@ Original text:
 Polite text:"""
 
 
+# The target language is placed after the text so the static instruction
+# block stays a shared prefix for provider-side prompt caching.
 REWRITE_TRANSLATE_TEMPLATE = """You are a helpful translation assistant.
 
-Translate the following text to {target_language}:
+Translate the following text to the target language given below:
 - Preserve the original meaning
 - Use natural, idiomatic expressions
 - Match the formality level of the original
@@ -82,6 +84,8 @@ Translate the following text to {target_language}:
 Original text:
 {text}
 
+Target language: {target_language}
+
 Translated text:"""
 
 
@@ -1,7 +1,24 @@
 """AI utility functions."""
 
+from functools import lru_cache
+
 import tiktoken
 
+# Prefix probe used by truncate_to_token_limit: English text averages ~4
+# characters per token, so 8x the budget almost always overshoots it.
+_PROBE_CHARS_PER_TOKEN = 8
+# Tokens near the cut point may merge differently than in the full text.
+_PROBE_MARGIN_TOKENS = 32
+
+
+@lru_cache(maxsize=8)
+def _get_encoding(model: str) -> tiktoken.Encoding:
+    """Resolve (and cache) the tokenizer for a model, falling back to cl100k_base."""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
 
 def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
     """
@@ -14,12 +31,32 @@ def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
     Returns:
         Number of tokens
     """
-    try:
-        encoding = tiktoken.encoding_for_model(model)
-    except KeyError:
-        encoding = tiktoken.get_encoding("cl100k_base")
+    return len(_get_encoding(model).encode(text))
 
-    return len(encoding.encode(text))
+
+def exceeds_token_limit(
+    text: str,
+    max_tokens: int,
+    model: str = "gpt-4o-mini",
+) -> bool:
+    """
+    Check whether text is longer than a token budget.
+
+    The tokenizer only runs when the UTF-8 byte length could exceed the
+    budget, so typical inputs are gated without being encoded.
+
+    Args:
+        text: Input text
+        max_tokens: Maximum allowed tokens
+        model: Model name for tokenizer selection
+
+    Returns:
+        True if the text has more than max_tokens tokens
+    """
+    if len(text.encode("utf-8")) <= max_tokens:
+        return False
+
+    return count_tokens(text, model) > max_tokens
 
 
 def truncate_to_token_limit(
@@ -38,10 +75,21 @@ def truncate_to_token_limit(
     Returns:
         Truncated text
     """
-    try:
-        encoding = tiktoken.encoding_for_model(model)
-    except KeyError:
-        encoding = tiktoken.get_encoding("cl100k_base")
+    # Every BPE token covers at least one UTF-8 byte, so text with no more
+    # bytes than the budget cannot exceed it and needs no tokenization.
+    if len(text.encode("utf-8")) <= max_tokens:
+        return text
+
+    encoding = _get_encoding(model)
+
+    # Tokenize only a generous prefix first. If it already holds comfortably
+    # more than the budget, the leading tokens match those of the full text
+    # and the rest of the string never needs to be encoded.
+    probe_chars = max_tokens * _PROBE_CHARS_PER_TOKEN
+    if len(text) > probe_chars:
+        tokens = encoding.encode(text[:probe_chars])
+        if len(tokens) > max_tokens + _PROBE_MARGIN_TOKENS:
+            return encoding.decode(tokens[:max_tokens])
 
     tokens = encoding.encode(text)
 
@@ -1,41 +1,42 @@
 """Common API dependencies."""
 
-from functools import lru_cache
 from typing import Annotated
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 
 from app.core.firebase import verify_firebase_token
-from app.services.rate_limiter import RateLimitService
+from app.services.rate_limiter import rate_limit_service
 
 # Type alias for authenticated user dependency
 CurrentUser = Annotated[dict, Depends(verify_firebase_token)]
 
+# Type alias for the Accept header, used for content negotiation
+AcceptHeader = Annotated[str | None, Header(alias="Accept")]
 
-@lru_cache
-def get_rate_limit_service() -> RateLimitService:
-    """Get cached rate limit service instance."""
-    return RateLimitService()
 
-
-def check_ai_rate_limit(
-    current_user: CurrentUser,
-    service: RateLimitService = Depends(get_rate_limit_service),
-) -> None:
+async def check_ai_rate_limit(current_user: CurrentUser) -> None:
     """
-    Check if the user has exceeded their daily AI rate limit.
+    Check if the user has exceeded their AI rate limit.
+    
+    AI_DAILY_RATE_LIMIT requests per user per day, enforced as a rolling
+    token bucket in memory or a UTC-day counter with Redis.
+    
+    Declared async so FastAPI runs it on the event loop instead of
+    dispatching it to the threadpool ahead of every AI request, and so
+    the Redis-backed limiter can be awaited.
     
     Args:
         current_user: Authenticated user
-        service: Rate limit service
         
     Raises:
         HTTPException: If limit exceeded (429)
     """
     user_id = current_user["uid"]
     
-    if not service.check_limit(user_id):
+    if not await rate_limit_service.check_limit(user_id):
+        retry_after = await rate_limit_service.get_retry_after_seconds(user_id)
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail="Daily AI rate limit exceeded. Please try again tomorrow.",
+            detail="AI rate limit exceeded. Please try again later.",
+            headers={"Retry-After": str(retry_after)},
         )
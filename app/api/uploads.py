@@ -0,0 +1,60 @@
+"""Helpers for handling uploaded files."""
+
+from typing import BinaryIO
+
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+# Image content types accepted by the upload endpoints
+ALLOWED_IMAGE_TYPES = frozenset({"image/jpeg", "image/png", "image/webp"})
+
+
+def _readinto_all(file: BinaryIO, buf: bytearray) -> bytearray:
+    """
+    Fill buf from file until it is full or the file ends.
+
+    A short read only means fewer bytes were ready, so keep reading. The
+    buffer is trimmed if the file ends early, and anything left once it
+    is full (an under-reported size) is appended rather than dropped.
+    """
+    read = 0
+    with memoryview(buf) as view:
+        while read < len(buf):
+            count = file.readinto(view[read:])
+            if not count:
+                break
+            read += count
+
+    if read < len(buf):
+        del buf[read:]
+    else:
+        buf += file.read()
+
+    return buf
+
+
+async def read_upload(upload: UploadFile) -> bytearray:
+    """
+    Read an uploaded file into a single buffer sized from its known length.
+
+    ``UploadFile.read()`` returns a fresh ``bytes`` object that grows as the
+    spooled file is drained. When the upload size is known, this reads into a
+    preallocated ``bytearray`` instead so the payload is copied exactly once.
+
+    Args:
+        upload: The uploaded file
+
+    Returns:
+        The file contents
+    """
+    if upload.size is None:
+        return bytearray(await upload.read())
+
+    buf = bytearray(upload.size)
+    await upload.seek(0)
+
+    # _in_memory is a private Starlette property; if it is missing, take the
+    # threadpool path, which is always safe
+    if getattr(upload, "_in_memory", False):
+        return _readinto_all(upload.file, buf)
+    return await run_in_threadpool(_readinto_all, upload.file, buf)
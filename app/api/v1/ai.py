@@ -1,16 +1,19 @@
 """AI-powered API endpoints."""
 
+import json
 import logging
+from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 
+from app.ai.batcher import batcher
 from app.ai.chains import moderator, qa_chain, rewriter, summarizer
-from app.api.deps import (
-    CurrentUser,
-    check_ai_rate_limit,
-    get_rate_limit_service,
-)
-from app.services.rate_limiter import RateLimitService
+from app.ai.utils import exceeds_token_limit
+from app.api.deps import AcceptHeader, CurrentUser, check_ai_rate_limit
+from app.config import settings
+from app.services.rate_limiter import rate_limit_service
+from app.services.response_cache import response_cache
 from app.schemas.ai import (
     ModerationRequest,
     ModerationResponse,
@@ -25,6 +28,61 @@ from app.schemas.ai import (
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Accept header value that opts a request into token streaming
+EVENT_STREAM_MEDIA_TYPE = "text/event-stream"
+
+# How long identical requests are served from the response cache
+GENERATION_CACHE_TTL_SECONDS = 60 * 60
+MODERATION_CACHE_TTL_SECONDS = 24 * 60 * 60
+
+
+def _wants_stream(accept: str | None) -> bool:
+    """Check whether the client asked for a Server-Sent Events response."""
+    return bool(accept) and EVENT_STREAM_MEDIA_TYPE in accept
+
+
+def _check_token_budget(text: str, label: str, max_tokens: int) -> None:
+    """Reject input whose token count exceeds the given prompt budget."""
+    if exceeds_token_limit(text, max_tokens):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{label} too long. Maximum {max_tokens:,} tokens allowed.",
+        )
+
+
+def _cache_key(template_id: str, chain: Any, chain_input: dict) -> str:
+    """Build the response cache key for a chain invocation."""
+    return response_cache.make_key(
+        template_id,
+        chain.llm.model_name,
+        chain.llm.temperature,
+        chain_input,
+    )
+
+
+def _stream_chain(chain: Any, chain_input: dict) -> StreamingResponse:
+    """
+    Stream an LLM chain's output to the client as Server-Sent Events.
+
+    Tokens are sent as they are decoded, each as a JSON ``{"text": ...}``
+    event, followed by a final ``[DONE]`` event.
+    """
+    runnable = chain.prompt | chain.llm
+
+    async def event_stream():
+        try:
+            async for chunk in runnable.astream(chain_input):
+                if chunk.content:
+                    yield f"data: {json.dumps({'text': chunk.content})}\n\n"
+        except Exception as e:
+            # Headers are already sent, so report the failure in-band
+            logger.error("Streaming generation failed: %s", e, exc_info=True)
+            yield f"event: error\ndata: {json.dumps({'detail': 'Generation failed'})}\n\n"
+            return
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(event_stream(), media_type=EVENT_STREAM_MEDIA_TYPE)
+
 
 @router.post(
     "/summarize-thread",
@@ -34,17 +92,19 @@ logger = logging.getLogger(__name__)
 async def summarize_thread(
     request: SummarizeRequest,
     current_user: CurrentUser,
-    rate_limit_service: RateLimitService = Depends(get_rate_limit_service),
+    accept: AcceptHeader = None,
 ):
     """
     Summarize thread content using AI.
     
     This endpoint uses LangChain with OpenAI to generate a concise summary of
-    the provided thread content. Requires authentication.
+    the provided thread content. Requires authentication. Send
+    ``Accept: text/event-stream`` to receive the summary as it is generated.
     
     Args:
         request: Contains the thread content to summarize
         current_user: Authenticated user information from Firebase
+        accept: Accept header, used to opt into streaming
         
     Returns:
         SummarizeResponse with the generated summary
@@ -53,22 +113,32 @@ async def summarize_thread(
         HTTPException: If summarization fails or content is invalid
     """
     try:
-        # Validate content length
-        if len(request.content) > 50000:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Content too long. Maximum 50,000 characters allowed.",
-            )
+        # Character limits are enforced by SummarizeRequest; check tokens here
+        _check_token_budget(request.content, "Content", settings.AI_MAX_INPUT_TOKENS)
         
         # Log the summarization request
         logger.info(
-            f"Summarization request from user {current_user['uid']}, "
-            f"content length: {len(request.content)} chars"
+            "Summarization request from user %s, content length: %d chars",
+            current_user["uid"],
+            len(request.content),
         )
         
         # Create and invoke the summarization chain
         chain = summarizer.create_summarizer_chain()
-        result = await chain.ainvoke({"thread_content": request.content})
+        chain_input = {"thread_content": request.content}
+        
+        if _wants_stream(accept):
+            await rate_limit_service.increment_usage(current_user["uid"])
+            return _stream_chain(chain, chain_input)
+        
+        # Serve repeated requests from the cache without counting usage
+        cache_key = _cache_key("summarize", chain, chain_input)
+        cached_summary = response_cache.get(cache_key)
+        if cached_summary is not None:
+            logger.info("Serving cached summary for user %s", current_user["uid"])
+            return SummarizeResponse(summary=cached_summary)
+        
+        result = await batcher.submit(chain, chain_input)
         
         # Extract summary from result
         summary = result.get("text", "")
@@ -78,10 +148,9 @@ async def summarize_thread(
                 detail="Failed to generate summary",
             )
         
-        logger.info(f"Successfully generated summary for user {current_user['uid']}")
-        
-        logger.info(f"Successfully generated summary for user {current_user['uid']}")
-        rate_limit_service.increment_usage(current_user["uid"])
+        logger.info("Successfully generated summary for user %s", current_user["uid"])
+        await rate_limit_service.increment_usage(current_user["uid"])
+        response_cache.set(cache_key, summary, GENERATION_CACHE_TTL_SECONDS)
         
         return SummarizeResponse(summary=summary)
         
@@ -90,7 +159,7 @@ async def summarize_thread(
         raise
     except Exception as e:
         # Log unexpected errors
-        logger.error(f"Summarization failed: {str(e)}", exc_info=True)
+        logger.error("Summarization failed: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Summarization failed: {str(e)}",
@@ -105,17 +174,19 @@ async def summarize_thread(
 async def question_answer(
     request: QARequest,
     current_user: CurrentUser,
-    rate_limit_service: RateLimitService = Depends(get_rate_limit_service),
+    accept: AcceptHeader = None,
 ):
     """
     Answer questions about thread content using AI.
     
     This endpoint uses LangChain with OpenAI to answer questions based on
-    the provided context. Requires authentication.
+    the provided context. Requires authentication. Send
+    ``Accept: text/event-stream`` to receive the answer as it is generated.
     
     Args:
         request: Contains the context and question
         current_user: Authenticated user information from Firebase
+        accept: Accept header, used to opt into streaming
         
     Returns:
         QAResponse with the generated answer
@@ -124,31 +195,40 @@ async def question_answer(
         HTTPException: If Q&A fails or input is invalid
     """
     try:
-        # Validate input lengths
-        if len(request.context) > 50000:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Context too long. Maximum 50,000 characters allowed.",
-            )
-        
-        if len(request.question) > 1000:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Question too long. Maximum 1,000 characters allowed.",
-            )
+        # Character limits are enforced by QARequest; check tokens here.
+        # Both fields end up in the same prompt, so they share one budget.
+        _check_token_budget(
+            f"{request.context}\n{request.question}",
+            "Context and question",
+            settings.AI_MAX_INPUT_TOKENS,
+        )
         
         # Log the Q&A request
         logger.info(
-            f"Q&A request from user {current_user['uid']}, "
-            f"context length: {len(request.context)} chars"
+            "Q&A request from user %s, context length: %d chars",
+            current_user["uid"],
+            len(request.context),
         )
         
         # Create and invoke the Q&A chain
         chain = qa_chain.create_qa_chain()
-        result = await chain.ainvoke({
+        chain_input = {
             "context": request.context,
             "question": request.question,
-        })
+        }
+        
+        if _wants_stream(accept):
+            await rate_limit_service.increment_usage(current_user["uid"])
+            return _stream_chain(chain, chain_input)
+        
+        # Serve repeated requests from the cache without counting usage
+        cache_key = _cache_key("qa", chain, chain_input)
+        cached_answer = response_cache.get(cache_key)
+        if cached_answer is not None:
+            logger.info("Serving cached answer for user %s", current_user["uid"])
+            return QAResponse(answer=cached_answer)
+        
+        result = await batcher.submit(chain, chain_input)
         
         # Extract answer from result
         answer = result.get("text", "")
@@ -158,10 +238,9 @@ async def question_answer(
                 detail="Failed to generate answer",
             )
         
-        logger.info(f"Successfully generated answer for user {current_user['uid']}")
-        
-        logger.info(f"Successfully generated answer for user {current_user['uid']}")
-        rate_limit_service.increment_usage(current_user["uid"])
+        logger.info("Successfully generated answer for user %s", current_user["uid"])
+        await rate_limit_service.increment_usage(current_user["uid"])
+        response_cache.set(cache_key, answer, GENERATION_CACHE_TTL_SECONDS)
         
         return QAResponse(answer=answer)
         
@@ -170,7 +249,7 @@ async def question_answer(
         raise
     except Exception as e:
         # Log unexpected errors
-        logger.error(f"Q&A failed: {str(e)}", exc_info=True)
+        logger.error("Q&A failed: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Q&A failed: {str(e)}",
@@ -185,7 +264,7 @@ async def question_answer(
 async def rewrite_text(
     request: RewriteRequest,
     current_user: CurrentUser,
-    rate_limit_service: RateLimitService = Depends(get_rate_limit_service),
+    accept: AcceptHeader = None,
 ):
     """
     Rewrite text using AI with different modes.
@@ -196,9 +275,12 @@ async def rewrite_text(
     - polite: Make text more polite and professional
     - translate: Translate to target language (default: Korean)
     
+    Send ``Accept: text/event-stream`` to receive the text as it is generated.
+    
     Args:
         request: Contains text, mode, and optional target language
         current_user: Authenticated user information from Firebase
+        accept: Accept header, used to opt into streaming
         
     Returns:
         RewriteResponse with the rewritten text and mode
@@ -207,32 +289,38 @@ async def rewrite_text(
         HTTPException: If rewriting fails or input is invalid
     """
     try:
-        # Validate text length
-        if len(request.text) > 10000:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Text too long. Maximum 10,000 characters allowed.",
-            )
+        # Character limits are enforced by RewriteRequest; check tokens here
+        _check_token_budget(request.text, "Text", settings.AI_MAX_TEXT_TOKENS)
         
         # Log the rewrite request
         logger.info(
-            f"Rewrite request from user {current_user['uid']}, "
-            f"mode: {request.mode}, text length: {len(request.text)} chars"
+            "Rewrite request from user %s, mode: %s, text length: %d chars",
+            current_user["uid"],
+            request.mode,
+            len(request.text),
         )
         
         # Create the rewrite chain for the specified mode
-        chain = rewriter.create_rewrite_chain(
-            mode=request.mode,
-            target_language=request.target_language or "Korean",
-        )
+        chain = rewriter.create_rewrite_chain(mode=request.mode)
         
         # Prepare input based on mode
         chain_input = {"text": request.text}
         if request.mode == rewriter.RewriteMode.TRANSLATE:
             chain_input["target_language"] = request.target_language or "Korean"
         
+        if _wants_stream(accept):
+            await rate_limit_service.increment_usage(current_user["uid"])
+            return _stream_chain(chain, chain_input)
+        
+        # Serve repeated requests from the cache without counting usage
+        cache_key = _cache_key(f"rewrite:{request.mode.value}", chain, chain_input)
+        cached_text = response_cache.get(cache_key)
+        if cached_text is not None:
+            logger.info("Serving cached rewrite for user %s", current_user["uid"])
+            return RewriteResponse(rewritten_text=cached_text, mode=request.mode)
+        
         # Invoke the chain
-        result = await chain.ainvoke(chain_input)
+        result = await batcher.submit(chain, chain_input)
         
         # Extract rewritten text from result
         rewritten_text = result.get("text", "")
@@ -243,10 +331,12 @@ async def rewrite_text(
             )
         
         logger.info(
-            f"Successfully rewrote text for user {current_user['uid']} "
-            f"using mode {request.mode}"
+            "Successfully rewrote text for user %s using mode %s",
+            current_user["uid"],
+            request.mode,
         )
-        rate_limit_service.increment_usage(current_user["uid"])
+        await rate_limit_service.increment_usage(current_user["uid"])
+        response_cache.set(cache_key, rewritten_text, GENERATION_CACHE_TTL_SECONDS)
         
         return RewriteResponse(
             rewritten_text=rewritten_text,
@@ -258,14 +348,14 @@ async def rewrite_text(
         raise
     except ValueError as e:
         # Handle invalid mode
-        logger.error(f"Invalid rewrite mode: {str(e)}")
+        logger.error("Invalid rewrite mode: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e),
         )
     except Exception as e:
         # Log unexpected errors
-        logger.error(f"Text rewrite failed: {str(e)}", exc_info=True)
+        logger.error("Text rewrite failed: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Text rewrite failed: {str(e)}",
@@ -280,7 +370,6 @@ async def rewrite_text(
 async def moderate_content(
     request: ModerationRequest,
     current_user: CurrentUser,
-    rate_limit_service: RateLimitService = Depends(get_rate_limit_service),
 ):
     """
     Moderate content using AI to assess risk and provide guidance.
@@ -308,36 +397,41 @@ async def moderate_content(
         HTTPException: If moderation fails or input is invalid
     """
     try:
-        # Validate content length
-        if len(request.content) > 10000:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Content too long. Maximum 10,000 characters allowed.",
-            )
+        # Character limits are enforced by ModerationRequest; check tokens here
+        _check_token_budget(request.content, "Content", settings.AI_MAX_TEXT_TOKENS)
         
         # Log the moderation request
         logger.info(
-            f"Moderation request from user {current_user['uid']}, "
-            f"content length: {len(request.content)} chars"
+            "Moderation request from user %s, content length: %d chars",
+            current_user["uid"],
+            len(request.content),
         )
         
         # Create and invoke the moderation chain
         chain = moderator.create_moderation_chain()
-        result = await chain.ainvoke({"content": request.content})
-        
-        # Extract and parse the moderation result
-        raw_result = result.get("text", "")
-        if not raw_result:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to generate moderation result",
-            )
+        chain_input = {"content": request.content}
+        
+        # Repeated content is re-parsed from the cached model output
+        cache_key = _cache_key("moderate", chain, chain_input)
+        raw_result = response_cache.get(cache_key)
+        is_cached = raw_result is not None
+        
+        if not is_cached:
+            result = await batcher.submit(chain, chain_input)
+            
+            # Extract and parse the moderation result
+            raw_result = result.get("text", "")
+            if not raw_result:
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail="Failed to generate moderation result",
+                )
         
         # Parse the JSON response
         try:
             parsed_result = moderator.parse_moderation_result(raw_result)
         except ValueError as e:
-            logger.error(f"Failed to parse moderation result: {e}")
+            logger.error("Failed to parse moderation result: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to parse moderation result",
@@ -347,11 +441,14 @@ async def moderate_content(
         flagged_for_review = parsed_result["risk_score"] >= 0.5
         
         logger.info(
-            f"Moderation complete for user {current_user['uid']}: "
-            f"risk_score={parsed_result['risk_score']:.2f}, "
-            f"flagged={flagged_for_review}"
+            "Moderation complete for user %s: risk_score=%.2f, flagged=%s",
+            current_user["uid"],
+            parsed_result["risk_score"],
+            flagged_for_review,
         )
-        rate_limit_service.increment_usage(current_user["uid"])
+        if not is_cached:
+            await rate_limit_service.increment_usage(current_user["uid"])
+            response_cache.set(cache_key, raw_result, MODERATION_CACHE_TTL_SECONDS)
         
         return ModerationResponse(
             risk_score=parsed_result["risk_score"],
@@ -365,7 +462,7 @@ async def moderate_content(
         raise
     except Exception as e:
         # Log unexpected errors
-        logger.error(f"Content moderation failed: {str(e)}", exc_info=True)
+        logger.error("Content moderation failed: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Content moderation failed: {str(e)}",
@@ -1,9 +1,19 @@
 """Image generation endpoints using Google 'Nano Banana Pro'."""
 
-import base64
 import io
 import logging
-from typing import Annotated
+import threading
+from contextlib import contextmanager
+from typing import Annotated, Any, Callable, Dict, Iterator
+from urllib.parse import quote
+
+import orjson
+
+try:
+    # SIMD-accelerated (AVX2/SSSE3) encoder; output matches the stdlib
+    from pybase64 import b64encode as _b64encode
+except ImportError:
+    from base64 import b64encode as _b64encode
 
 from fastapi import (
     APIRouter,
@@ -15,25 +25,235 @@ from fastapi import (
     UploadFile,
     status,
 )
+from fastapi.concurrency import run_in_threadpool
 
-from app.api.deps import CurrentUser
+from app.api.deps import AcceptHeader, CurrentUser
+from app.api.uploads import ALLOWED_IMAGE_TYPES, read_upload
 from app.schemas.image import ImageGenerationRequest, ImageResponse
 from app.services.image_service import ImageService
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Per-thread scratch buffer reused for PIL fallback encodes
+_buf_tls = threading.local()
+# Pooled buffers larger than this are dropped rather than kept resident
+_MAX_POOLED_BUFFER_BYTES = 16 * 1024 * 1024
+
+
+@contextmanager
+def _pooled_buffer() -> Iterator[io.BytesIO]:
+    """Yield this thread's reusable BytesIO, reset and ready for writing."""
+    buf = getattr(_buf_tls, "buf", None)
+    if buf is None:
+        buf = _buf_tls.buf = io.BytesIO()
+
+    buf.seek(0)
+    buf.truncate()
+    try:
+        yield buf
+    finally:
+        if buf.tell() > _MAX_POOLED_BUFFER_BYTES:
+            _buf_tls.buf = None
+
+
+def _encode_png(image) -> bytes:
+    """Encode a PIL-style image (anything with .save) to PNG bytes."""
+    with _pooled_buffer() as buf:
+        image.save(buf, format="PNG")
+        # The buffer was truncated on checkout, so its contents are exactly the
+        # PNG; the view is released before the buffer is reused
+        with buf.getbuffer() as view:
+            return bytes(view)
+
+
+def _encode_png_view(image) -> memoryview:
+    """
+    Encode a PIL-style image to PNG in a private buffer, without copying.
+
+    Used when the PNG goes to the client as-is. The returned view keeps its
+    BytesIO alive until the response is sent, so it cannot use the pooled
+    buffer, which the next encode on this thread would overwrite.
+    """
+    buf = io.BytesIO()
+    image.save(buf, format="PNG")
+    return buf.getbuffer()
+
+
+# Magic-number prefixes for the formats the image models return
+_IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"RIFF", "image/webp"),
+)
+
+# Payloads below this encode faster inline than a threadpool hop costs
+_OFFLOAD_MIN_BYTES = 64 * 1024
+
+# Documents the raw-bytes alternative to the JSON body in OpenAPI
+_RAW_IMAGE_RESPONSES = {200: {"content": {"image/png": {}}}}
+
+
+def _wants_raw_image(accept: str | None) -> bool:
+    """Check whether the client asked for the image bytes instead of JSON."""
+    return bool(accept) and "image/" in accept
+
+
+def _image_media_type(image_data: bytes) -> str:
+    """Sniff the image format from its leading bytes, defaulting to PNG."""
+    for signature, media_type in _IMAGE_SIGNATURES:
+        if image_data[: len(signature)] == signature:
+            return media_type
+    return "image/png"
+
+
+async def _b64encode_bytes(image_data: bytes) -> bytes:
+    """Base64-encode image bytes, off the event loop for large payloads."""
+    if len(image_data) < _OFFLOAD_MIN_BYTES:
+        return _b64encode(image_data)
+    return await run_in_threadpool(_b64encode, image_data)
+
+
+def _image_json_body(b64_image: bytes, revised_prompt: str) -> bytes:
+    """
+    Serialize an ImageResponse body around already encoded base64 bytes.
+
+    Base64 output is pure ASCII and never needs JSON escaping, so it is
+    spliced in as-is. Going through the model would decode it to str,
+    validate it, and have the JSON encoder rescan every character.
+    """
+    return b"".join((
+        b'{"url":null,"b64_json":"',
+        b64_image,
+        b'","revised_prompt":',
+        orjson.dumps(revised_prompt),
+        b"}",
+    ))
+
+
+async def _image_response(
+    image_data: bytes | memoryview,
+    revised_prompt: str,
+    accept: str | None,
+):
+    """
+    Build the endpoint response for generated image bytes.
+
+    Clients sending ``Accept: image/*`` get the raw bytes, which skips the
+    base64 encode and its ~33% size overhead. Everyone else gets the JSON
+    ImageResponse body, written directly from the encoded bytes.
+    """
+    if _wants_raw_image(accept):
+        # Starlette (0.38+, see requirements.txt) sends bytes and memoryviews
+        # as-is; copy anything else
+        if not isinstance(image_data, (bytes, memoryview)):
+            image_data = bytes(image_data)
+        return Response(
+            content=image_data,
+            media_type=_image_media_type(image_data),
+            # Header values must be latin-1, so the prompt is percent-encoded
+            headers={"X-Revised-Prompt": quote(revised_prompt)},
+        )
+
+    b64_image = await _b64encode_bytes(image_data)
+    return Response(
+        content=_image_json_body(b64_image, revised_prompt),
+        media_type="application/json",
+    )
 
-def get_image_service() -> ImageService:
-    """Dependency to get image service instance."""
-    return ImageService()
 
+def _get_private_image_bytes(result: Any) -> bytes:
+    return result._image_bytes
 
-@router.post("/generate", response_model=ImageResponse)
+
+def _get_image_bytes(result: Any) -> bytes:
+    return result.image_bytes
+
+
+# Byte extractor per result type, resolved by probing the first instance
+_EXTRACTORS: Dict[type, Callable[[Any], bytes]] = {bytes: bytes}
+
+
+def _resolve_extractor(result: Any) -> Callable[[Any], bytes]:
+    """
+    Pick the byte extractor for a service result's type.
+
+    The SDKs return bytes, wrapper objects exposing ``_image_bytes`` or
+    ``image_bytes``, or PIL images. The attribute probe runs once per type;
+    later results of the same type are a single dict lookup.
+
+    Raises:
+        ValueError: If the result type has no known image representation
+    """
+    result_type = type(result)
+    extractor = _EXTRACTORS.get(result_type)
+    if extractor is not None:
+        return extractor
+
+    if isinstance(result, bytes):
+        extractor = bytes
+    elif hasattr(result, "_image_bytes"):
+        extractor = _get_private_image_bytes
+    elif hasattr(result, "image_bytes"):
+        extractor = _get_image_bytes
+    elif hasattr(result, "save"):  # PIL
+        extractor = _encode_png
+    else:
+        raise ValueError("Unknown image format returned from service")
+
+    _EXTRACTORS[result_type] = extractor
+    return extractor
+
+
+async def _extract_image_bytes(
+    result: Any,
+    raw: bool = False,
+) -> bytes | memoryview:
+    """
+    Turn a service result into raw image bytes.
+
+    Args:
+        result: The image object returned by the service
+        raw: Whether the bytes go to the client unmodified, in which case a
+            PIL image is encoded straight into the response buffer
+
+    Returns:
+        The image bytes, or a view over them for raw PIL encodes
+    """
+    extractor = _resolve_extractor(result)
+    if extractor is _encode_png:
+        if raw:
+            extractor = _encode_png_view
+        # PNG encoding is CPU-bound, keep it off the event loop
+        return await run_in_threadpool(extractor, result)
+    return extractor(result)
+
+
+_image_service: ImageService | None = None
+
+
+async def get_image_service() -> ImageService:
+    """
+    Dependency to get image service instance.
+
+    Async so FastAPI resolves it on the event loop instead of the threadpool.
+    """
+    global _image_service
+    if _image_service is None:
+        _image_service = ImageService()
+    return _image_service
+
+
+@router.post(
+    "/generate",
+    response_model=ImageResponse,
+    responses=_RAW_IMAGE_RESPONSES,
+)
 async def generate_image(
     request: ImageGenerationRequest,
     current_user: CurrentUser,
     image_service: ImageService = Depends(get_image_service),
+    accept: AcceptHeader = None,
 ):
     """
     Generate an image from a text prompt using Google 'Nano Banana Pro'.
@@ -42,12 +262,13 @@ async def generate_image(
         request: Contains the text prompt.
         current_user: Authenticated user.
         image_service: Service to handle image generation.
+        accept: Accept header; ``image/*`` returns the raw image bytes.
         
     Returns:
-        ImageResponse with base64 encoded image or URL.
+        ImageResponse with base64 encoded image or URL, or the raw image.
     """
     try:
-        logger.info(f"Image generation request from user {current_user['uid']}")
+        logger.info("Image generation request from user %s", current_user["uid"])
         
         # Call service to generate image
         # Returns a specialized object from the SDK, we'll need to process it.
@@ -55,61 +276,38 @@ async def generate_image(
         # In a real integration, we'd extract bytes/url here or in service.
         result = await image_service.generate_image(request.prompt)
         
-        # Assuming the service returns the PIL Image or bytes wrapper in 'result'
-        # We need to convert it to base64 for the frontend if it's not a URL
-        
-        # If result has 'image_bytes' (common in some SDKs) or if it IS bytes/PIL
-        # Let's handle generic case here assuming service might return bytes or object
-        
-        # Adaptation layer for the API response
-        # If it's pure bytes:
-        if isinstance(result, bytes):
-            image_data = result
-        # If it has a property like ._image_bytes or .bytes
-        elif hasattr(result, "_image_bytes"):
-             image_data = result._image_bytes
-        elif hasattr(result, "image_bytes"):
-             image_data = result.image_bytes    
-        else:
-             # Fallback or error if unknown structure
-             # For MVP stub, lets assume it returns the bytes or something convertible
-             # If using PIL image:
-             if hasattr(result, "save"):
-                 buf = io.BytesIO()
-                 result.save(buf, format="PNG")
-                 image_data = buf.getvalue()
-             else:
-                 # Last resort, str (maybe url or b64 already?)
-                 if isinstance(result, str):
-                     if result.startswith("http"):
-                         return ImageResponse(url=result, revised_prompt=request.prompt)
-                     # assume b64
-                     return ImageResponse(b64_json=result, revised_prompt=request.prompt)
-                 else:
-                     raise ValueError("Unknown image format returned from service")
-
-        # Convert bytes to base64 string
-        b64_img = base64.b64encode(image_data).decode("utf-8")
-        
-        return ImageResponse(
-            b64_json=b64_img,
-            revised_prompt=request.prompt # Some models revise prompts, pass through for now
+        # Plain strings are either a hosted URL or an already encoded image
+        if isinstance(result, str):
+            if result.startswith("http"):
+                return ImageResponse(url=result, revised_prompt=request.prompt)
+            return ImageResponse(b64_json=result, revised_prompt=request.prompt)
+
+        image_data = await _extract_image_bytes(
+            result, raw=_wants_raw_image(accept)
         )
 
+        # Some models revise prompts, pass through for now
+        return await _image_response(image_data, request.prompt, accept)
+
     except Exception as e:
-        logger.error(f"Generate image failed: {e}", exc_info=True)
+        logger.error("Generate image failed: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Image generation failed: {str(e)}",
         )
 
 
-@router.post("/edit", response_model=ImageResponse)
+@router.post(
+    "/edit",
+    response_model=ImageResponse,
+    responses=_RAW_IMAGE_RESPONSES,
+)
 async def edit_image(
     prompt: Annotated[str, Form(...)],
     image: Annotated[UploadFile, File(...)],
     current_user: CurrentUser,
     image_service: ImageService = Depends(get_image_service),
+    accept: AcceptHeader = None,
 ):
     """
     Edit an uploaded image based on a text prompt using Google 'Nano Banana Pro'.
@@ -119,51 +317,37 @@ async def edit_image(
         image: The image file to edit.
         current_user: Authenticated user.
         image_service: Service to handle image editing.
+        accept: Accept header; ``image/*`` returns the raw image bytes.
         
     Returns:
-        ImageResponse with base64 encoded edited image.
+        ImageResponse with base64 encoded edited image, or the raw image.
     """
     try:
-        logger.info(f"Image edit request from user {current_user['uid']}")
+        logger.info("Image edit request from user %s", current_user["uid"])
         
         # Validate file type
-        if image.content_type not in ["image/jpeg", "image/png", "image/webp"]:
+        if image.content_type not in ALLOWED_IMAGE_TYPES:
              raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Invalid image format. Supported: JPEG, PNG, WEBP",
             )
         
-        # Read image content
-        content = await image.read()
+        # Read image content into a single preallocated buffer
+        content = await read_upload(image)
         
         # Call service
         result = await image_service.edit_image(prompt, content)
         
-        # Process result (similar adaptation logic as generate)
-        if isinstance(result, bytes):
-            image_data = result
-        elif hasattr(result, "_image_bytes"):
-             image_data = result._image_bytes
-        elif hasattr(result, "image_bytes"):
-             image_data = result.image_bytes    
-        elif hasattr(result, "save"): # PIL
-             buf = io.BytesIO()
-             result.save(buf, format="PNG")
-             image_data = buf.getvalue()
-        else:
-             raise ValueError("Unknown image format returned from service")
-
-        b64_img = base64.b64encode(image_data).decode("utf-8")
-        
-        return ImageResponse(
-            b64_json=b64_img,
-            revised_prompt=prompt
+        image_data = await _extract_image_bytes(
+            result, raw=_wants_raw_image(accept)
         )
 
+        return await _image_response(image_data, prompt, accept)
+
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Edit image failed: {e}", exc_info=True)
+        logger.error("Edit image failed: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Image editing failed: {str(e)}",
@@ -1,11 +1,13 @@
 """Music generation endpoints using Google Lyria RealTime."""
 
 import logging
+from typing import Annotated
 
 from fastapi import (
     APIRouter,
     Depends,
     HTTPException,
+    Query,
     status,
 )
 
@@ -20,9 +22,19 @@ router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
-def get_music_service() -> MusicService:
-    """Dependency to get music service instance."""
-    return MusicService()
+_music_service: MusicService | None = None
+
+
+async def get_music_service() -> MusicService:
+    """
+    Dependency to get music service instance.
+
+    Async so FastAPI resolves it on the event loop instead of the threadpool.
+    """
+    global _music_service
+    if _music_service is None:
+        _music_service = MusicService()
+    return _music_service
 
 
 @router.post("/generate", response_model=MusicGenerationResponse)
@@ -47,8 +59,10 @@ async def generate_music(
     """
     try:
         logger.info(
-            f"Music generation request from user {current_user['uid']}: "
-            f"{len(request.prompts)} prompts, {request.duration_seconds}s"
+            "Music generation request from user %s: %d prompts, %ss",
+            current_user["uid"],
+            len(request.prompts),
+            request.duration_seconds,
         )
         
         response = await music_service.generate_music(
@@ -58,20 +72,21 @@ async def generate_music(
         )
         
         logger.info(
-            f"Generated {response.duration_seconds:.2f}s of music for user "
-            f"{current_user['uid']}"
+            "Generated %.2fs of music for user %s",
+            response.duration_seconds,
+            current_user["uid"],
         )
         
         return response
 
     except RuntimeError as e:
-        logger.error(f"Music service not initialized: {e}")
+        logger.error("Music service not initialized: %s", e)
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Music generation service not available",
         )
     except Exception as e:
-        logger.error(f"Generate music failed: {e}", exc_info=True)
+        logger.error("Generate music failed: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Music generation failed: {str(e)}",
@@ -83,8 +98,8 @@ async def generate_music_simple(
     prompt: str,
     current_user: CurrentUser,
     music_service: MusicService = Depends(get_music_service),
-    bpm: int = 120,
-    duration_seconds: int = 30,
+    bpm: Annotated[int, Query(ge=60, le=200)] = 120,
+    duration_seconds: Annotated[int, Query(ge=5, le=120)] = 30,
 ):
     """
     Simplified music generation with a single text prompt.
@@ -100,21 +115,12 @@ async def generate_music_simple(
         MusicGenerationResponse with base64 encoded audio data.
     """
     try:
-        # Validate parameters
-        if not 60 <= bpm <= 200:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="BPM must be between 60 and 200",
-            )
-        if not 5 <= duration_seconds <= 120:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Duration must be between 5 and 120 seconds",
-            )
-        
         logger.info(
-            f"Simple music generation from user {current_user['uid']}: "
-            f"'{prompt[:50]}...', {bpm} BPM, {duration_seconds}s"
+            "Simple music generation from user %s: '%.50s...', %s BPM, %ss",
+            current_user["uid"],
+            prompt,
+            bpm,
+            duration_seconds,
         )
         
         response = await music_service.generate_music_simple(
@@ -125,16 +131,14 @@ async def generate_music_simple(
         
         return response
 
-    except HTTPException:
-        raise
     except RuntimeError as e:
-        logger.error(f"Music service not initialized: {e}")
+        logger.error("Music service not initialized: %s", e)
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Music generation service not available",
         )
     except Exception as e:
-        logger.error(f"Generate simple music failed: {e}", exc_info=True)
+        logger.error("Generate simple music failed: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Music generation failed: {str(e)}",
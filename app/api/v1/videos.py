@@ -1,6 +1,5 @@
 """Video generation endpoints using Google Veo 3.1."""
 
-import base64
 import logging
 from typing import Annotated
 
@@ -13,10 +12,12 @@ from fastapi import (
     UploadFile,
     status,
 )
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
 
 from app.api.deps import CurrentUser
+from app.api.uploads import ALLOWED_IMAGE_TYPES, read_upload
 from app.schemas.video import (
-    VideoFromImageRequest,
     VideoGenerationConfig,
     VideoGenerationRequest,
     VideoGenerationResponse,
@@ -27,12 +28,16 @@ from app.services.video_service import VideoService
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# Singleton instance for operation tracking
+# Singleton instance so the genai client is created once
 _video_service: VideoService | None = None
 
 
-def get_video_service() -> VideoService:
-    """Dependency to get video service instance."""
+async def get_video_service() -> VideoService:
+    """
+    Dependency to get video service instance.
+
+    Async so FastAPI resolves it on the event loop instead of the threadpool.
+    """
     global _video_service
     if _video_service is None:
         _video_service = VideoService()
@@ -60,7 +65,7 @@ async def generate_video(
         VideoGenerationResponse with operation_id for polling.
     """
     try:
-        logger.info(f"Video generation request from user {current_user['uid']}")
+        logger.info("Video generation request from user %s", current_user["uid"])
         
         response = await video_service.generate_video(
             prompt=request.prompt,
@@ -70,13 +75,13 @@ async def generate_video(
         return response
 
     except RuntimeError as e:
-        logger.error(f"Video service not initialized: {e}")
+        logger.error("Video service not initialized: %s", e)
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Video generation service not available",
         )
     except Exception as e:
-        logger.error(f"Generate video failed: {e}", exc_info=True)
+        logger.error("Generate video failed: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Video generation failed: {str(e)}",
@@ -109,28 +114,33 @@ async def generate_video_from_image(
         VideoGenerationResponse with operation_id for polling.
     """
     try:
-        logger.info(f"Image-to-video request from user {current_user['uid']}")
+        logger.info("Image-to-video request from user %s", current_user["uid"])
         
         # Validate file type
-        if image.content_type not in ["image/jpeg", "image/png", "image/webp"]:
+        if image.content_type not in ALLOWED_IMAGE_TYPES:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Invalid image format. Supported: JPEG, PNG, WEBP",
             )
         
-        # Read image content
-        image_bytes = await image.read()
+        # Read image content into a single preallocated buffer
+        image_bytes = await read_upload(image)
         
-        # Build config from form fields
-        config = VideoGenerationConfig()
-        if aspect_ratio:
-            config.aspect_ratio = aspect_ratio
-        if resolution:
-            config.resolution = resolution
-        if duration_seconds:
-            config.duration_seconds = duration_seconds
-        if negative_prompt:
-            config.negative_prompt = negative_prompt
+        # Build config from the provided form fields in one validated pass
+        config_fields = {
+            name: value
+            for name, value in (
+                ("aspect_ratio", aspect_ratio),
+                ("resolution", resolution),
+                ("duration_seconds", duration_seconds),
+                ("negative_prompt", negative_prompt),
+            )
+            if value
+        }
+        try:
+            config = VideoGenerationConfig(**config_fields)
+        except ValidationError as e:
+            raise RequestValidationError(e.errors())
         
         response = await video_service.generate_video_from_image(
             prompt=prompt,
@@ -140,23 +150,24 @@ async def generate_video_from_image(
         
         return response
 
-    except HTTPException:
+    except (HTTPException, RequestValidationError):
         raise
     except RuntimeError as e:
-        logger.error(f"Video service not initialized: {e}")
+        logger.error("Video service not initialized: %s", e)
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Video generation service not available",
         )
     except Exception as e:
-        logger.error(f"Image-to-video failed: {e}", exc_info=True)
+        logger.error("Image-to-video failed: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Image-to-video generation failed: {str(e)}",
         )
 
 
-@router.get("/status/{operation_id}", response_model=VideoOperationStatusResponse)
+# Operation IDs are Google resource names, which contain slashes
+@router.get("/status/{operation_id:path}", response_model=VideoOperationStatusResponse)
 async def get_video_status(
     operation_id: str,
     current_user: CurrentUser,
@@ -177,7 +188,7 @@ async def get_video_status(
     """
     try:
         logger.info(
-            f"Video status check from user {current_user['uid']}: {operation_id}"
+            "Video status check from user %s: %s", current_user["uid"], operation_id
         )
         
         response = await video_service.get_operation_status(operation_id)
@@ -185,7 +196,7 @@ async def get_video_status(
         return response
 
     except Exception as e:
-        logger.error(f"Get video status failed: {e}", exc_info=True)
+        logger.error("Get video status failed: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to get operation status: {str(e)}",
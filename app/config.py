@@ -31,8 +31,18 @@ class Settings(BaseSettings):
     # Google Lyria Music Generation
     GOOGLE_MUSIC_MODEL: str = "models/lyria-realtime-exp"
 
-    # AI Rate Limiting
+    # AI Rate Limiting (requests per user per day; 0 disables the limit).
+    # In memory this is a rolling token bucket regaining one request every
+    # day / limit; with REDIS_URL it is a counter reset at UTC midnight.
     AI_DAILY_RATE_LIMIT: int = 50
+    # Shared rate-limit store; in-memory per process when unset
+    REDIS_URL: str = ""
+
+    # Maximum prompt input size, in model tokens, for long-form context
+    # (summaries, and Q&A context plus question together)
+    AI_MAX_INPUT_TOKENS: int = 16000
+    # Maximum size of short user text that is rewritten or moderated
+    AI_MAX_TEXT_TOKENS: int = 4000
 
     class Config:
         env_file = ".env"
@@ -1,10 +1,14 @@
 """Firebase authentication module."""
 
+import hashlib
 import logging
 import os
+import time
 from typing import Optional
 
+from cachetools import TTLCache
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from firebase_admin import auth, credentials, initialize_app
 
@@ -18,9 +22,18 @@ security = HTTPBearer(auto_error=False)
 # Firebase initialization flag
 _firebase_initialized = False
 
+# Decoded claims of recently verified tokens, keyed by a hash of the token.
+# firebase_admin already caches Google's public keys per their Cache-Control.
+_verified_tokens: TTLCache = TTLCache(maxsize=10_000, ttl=300)
+
+
+def _token_cache_key(token: str) -> bytes:
+    """Hash a raw ID token so the cache never holds bearer credentials."""
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
 
 def initialize_firebase() -> None:
-    """Initialize Firebase Admin SDK."""
+    """Initialize Firebase Admin SDK. Called once from the app lifespan."""
     global _firebase_initialized
     if _firebase_initialized:
         return
@@ -64,14 +77,18 @@ async def verify_firebase_token(
         )
 
     token = credentials.credentials
+    cache_key = _token_cache_key(token)
 
-    try:
-        # Initialize Firebase if not already done
-        initialize_firebase()
+    # Reuse a recent verification unless the token has since expired
+    cached_token = _verified_tokens.get(cache_key)
+    if cached_token is not None and cached_token.get("exp", 0) > time.time():
+        return cached_token
 
-        # If we are in dev mode and credentials path is special, we could mock
-        # For now, we try real verification
-        decoded_token = auth.verify_id_token(token)
+    try:
+        # The SDK call is blocking (RSA verify, and a certificate fetch on
+        # refresh), so keep it off the event loop
+        decoded_token = await run_in_threadpool(auth.verify_id_token, token)
+        _verified_tokens[cache_key] = decoded_token
         return decoded_token
 
     except Exception as e:
@@ -1,13 +1,26 @@
 """FastAPI application entry point."""
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.v1.router import api_router
 from app.config import settings
+from app.core.firebase import initialize_firebase
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run one-time startup work before serving requests."""
+    # Initialize Firebase once here instead of on every authenticated request
+    initialize_firebase()
+    yield
+
 
 app = FastAPI(
     title=settings.APP_NAME,
+    lifespan=lifespan,
     openapi_url=f"{settings.API_V1_PREFIX}/openapi.json",
     docs_url="/docs",
     redoc_url="/redoc",
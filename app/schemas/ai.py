@@ -4,14 +4,14 @@ from enum import Enum
 
 from pydantic import BaseModel, Field
 
+from app.schemas.fields import LongText, UserText
+
 
 class SummarizeRequest(BaseModel):
     """Request schema for thread summarization."""
 
-    content: str = Field(
+    content: LongText = Field(
         ...,
-        min_length=10,
-        max_length=50000,
         description="Thread content to summarize",
         examples=["This is a long discussion about AI and machine learning..."],
     )
@@ -30,10 +30,8 @@ class SummarizeResponse(BaseModel):
 class QARequest(BaseModel):
     """Request schema for Q&A."""
 
-    context: str = Field(
+    context: LongText = Field(
         ...,
-        min_length=10,
-        max_length=50000,
         description="Context to answer from",
         examples=["The discussion covered various deployment strategies including blue-green..."],
     )
@@ -68,10 +66,8 @@ class RewriteMode(str, Enum):
 class RewriteRequest(BaseModel):
     """Request schema for text rewriting."""
 
-    text: str = Field(
+    text: UserText = Field(
         ...,
-        min_length=1,
-        max_length=10000,
         description="Text to rewrite",
         examples=["This code is really bad and needs to be fixed ASAP."],
     )
@@ -104,10 +100,8 @@ class RewriteResponse(BaseModel):
 class ModerationRequest(BaseModel):
     """Request schema for content moderation."""
 
-    content: str = Field(
+    content: UserText = Field(
         ...,
-        min_length=1,
-        max_length=10000,
         description="Content to moderate",
         examples=["This forum has great discussions about technology!"],
     )
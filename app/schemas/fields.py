@@ -0,0 +1,14 @@
+"""Constrained field types shared across schemas."""
+
+from typing import Annotated
+
+from pydantic import StringConstraints
+
+# Long-form content such as a thread body used as AI context
+LongText = Annotated[str, StringConstraints(min_length=10, max_length=50000)]
+
+# User-written text that is rewritten or moderated as a whole
+UserText = Annotated[str, StringConstraints(min_length=1, max_length=10000)]
+
+# Text prompt for video generation
+VideoPromptText = Annotated[str, StringConstraints(min_length=1, max_length=2000)]
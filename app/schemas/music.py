@@ -1,9 +1,8 @@
 """Music generation related Pydantic schemas for Lyria RealTime."""
 
 from enum import Enum
-from typing import List, Optional
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class MusicScale(str, Enum):
@@ -56,6 +55,9 @@ class WeightedPrompt(BaseModel):
 class MusicGenerationConfig(BaseModel):
     """Configuration for music generation."""
     
+    # Read-only once validated, so one default instance can be shared
+    model_config = ConfigDict(frozen=True)
+    
     bpm: int = Field(
         default=120,
         ge=60,
@@ -74,19 +76,19 @@ class MusicGenerationConfig(BaseModel):
         le=6.0,
         description="How strictly to follow prompts (0.0-6.0)",
     )
-    density: Optional[float] = Field(
+    density: float | None = Field(
         None,
         ge=0.0,
         le=1.0,
         description="Density of musical notes (0.0=sparse, 1.0=busy)",
     )
-    brightness: Optional[float] = Field(
+    brightness: float | None = Field(
         None,
         ge=0.0,
         le=1.0,
         description="Tonal quality (0.0=dark, 1.0=bright)",
     )
-    scale: Optional[MusicScale] = Field(
+    scale: MusicScale | None = Field(
         None,
         description="Musical scale/key for generation",
     )
@@ -108,17 +110,21 @@ class MusicGenerationConfig(BaseModel):
     )
 
 
+# Shared by every request that omits the config
+DEFAULT_MUSIC_CONFIG = MusicGenerationConfig()
+
+
 class MusicGenerationRequest(BaseModel):
     """Request schema for generating music."""
     
-    prompts: List[WeightedPrompt] = Field(
+    prompts: list[WeightedPrompt] = Field(
         ...,
         min_length=1,
         max_length=5,
         description="List of weighted prompts describing the music",
     )
-    config: Optional[MusicGenerationConfig] = Field(
-        default_factory=MusicGenerationConfig,
+    config: MusicGenerationConfig | None = Field(
+        default=DEFAULT_MUSIC_CONFIG,
         description="Music generation configuration",
     )
     duration_seconds: int = Field(
@@ -127,14 +133,6 @@ class MusicGenerationRequest(BaseModel):
         le=120,
         description="Duration of audio to generate (5-120 seconds)",
     )
-    
-    @field_validator("prompts")
-    @classmethod
-    def validate_prompts(cls, v: List[WeightedPrompt]) -> List[WeightedPrompt]:
-        """Ensure at least one prompt is provided."""
-        if not v:
-            raise ValueError("At least one prompt is required")
-        return v
 
 
 class MusicGenerationResponse(BaseModel):
@@ -160,7 +158,7 @@ class MusicGenerationResponse(BaseModel):
         ...,
         description="Actual duration of generated audio",
     )
-    prompts_used: List[str] = Field(
+    prompts_used: list[str] = Field(
         default_factory=list,
         description="The prompts that were used for generation",
     )
@@ -169,14 +167,17 @@ class MusicGenerationResponse(BaseModel):
 class MusicStreamRequest(BaseModel):
     """Request schema for starting a music stream session."""
     
-    prompts: List[WeightedPrompt] = Field(
+    # Not mounted on a route yet, so build the validator on first use
+    model_config = ConfigDict(defer_build=True)
+    
+    prompts: list[WeightedPrompt] = Field(
         ...,
         min_length=1,
         max_length=5,
         description="Initial weighted prompts",
     )
-    config: Optional[MusicGenerationConfig] = Field(
-        default_factory=MusicGenerationConfig,
+    config: MusicGenerationConfig | None = Field(
+        default=DEFAULT_MUSIC_CONFIG,
         description="Initial music generation configuration",
     )
 
@@ -184,6 +185,9 @@ class MusicStreamRequest(BaseModel):
 class MusicStreamResponse(BaseModel):
     """Response for music stream session creation."""
     
+    # Not mounted on a route yet, so build the validator on first use
+    model_config = ConfigDict(defer_build=True)
+    
     session_id: str = Field(
         ...,
         description="Session ID for WebSocket connection",
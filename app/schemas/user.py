@@ -2,13 +2,15 @@
 
 from datetime import datetime
 
-from pydantic import BaseModel, ConfigDict, EmailStr
+from pydantic import BaseModel, ConfigDict
 
 
 class UserBase(BaseModel):
     """Base user schema."""
 
-    email: EmailStr
+    # Emails come from Firebase-verified accounts, so output schemas skip the
+    # EmailStr check; inbound schemas that accept an address should use it
+    email: str
     display_name: str
 
 
@@ -18,4 +20,5 @@ class UserResponse(UserBase):
     id: str
     created_at: datetime | None = None
 
-    model_config = ConfigDict(from_attributes=True)
+    # Not mounted on a route yet, so build the validator on first use
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
@@ -1,9 +1,10 @@
 """Video generation related Pydantic schemas for Veo 3.1."""
 
 from enum import Enum
-from typing import Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+
+from app.schemas.fields import VideoPromptText
 
 
 class AspectRatio(str, Enum):
@@ -39,6 +40,9 @@ class PersonGeneration(str, Enum):
 class VideoGenerationConfig(BaseModel):
     """Configuration for video generation."""
     
+    # Read-only once validated, so one default instance can be shared
+    model_config = ConfigDict(frozen=True)
+    
     aspect_ratio: AspectRatio = Field(
         default=AspectRatio.LANDSCAPE,
         description="Video aspect ratio (16:9 or 9:16)",
@@ -51,7 +55,7 @@ class VideoGenerationConfig(BaseModel):
         default=VideoDuration.LONG,
         description="Video duration in seconds (4, 6, or 8)",
     )
-    negative_prompt: Optional[str] = Field(
+    negative_prompt: str | None = Field(
         None,
         max_length=500,
         description="What to avoid in the generated video",
@@ -60,26 +64,28 @@ class VideoGenerationConfig(BaseModel):
         default=PersonGeneration.ALLOW_ADULT,
         description="Person generation settings",
     )
-    seed: Optional[int] = Field(
+    seed: int | None = Field(
         None,
         description="Seed for slightly improved determinism",
     )
 
 
+# Shared by every request that omits the config
+DEFAULT_VIDEO_CONFIG = VideoGenerationConfig()
+
+
 class VideoGenerationRequest(BaseModel):
     """Request schema for generating a video from a text prompt."""
     
-    prompt: str = Field(
+    prompt: VideoPromptText = Field(
         ...,
-        min_length=1,
-        max_length=2000,
         description="Text prompt describing the video to generate",
         examples=[
             "A cinematic shot of a majestic lion in the savannah at sunset"
         ],
     )
-    config: Optional[VideoGenerationConfig] = Field(
-        default_factory=VideoGenerationConfig,
+    config: VideoGenerationConfig | None = Field(
+        default=DEFAULT_VIDEO_CONFIG,
         description="Video generation configuration",
     )
 
@@ -87,15 +93,17 @@ class VideoGenerationRequest(BaseModel):
 class VideoFromImageRequest(BaseModel):
     """Request schema for generating a video from an image."""
     
-    prompt: str = Field(
+    # Not mounted on a route (the endpoint takes form/path params), so
+    # build the validator on first use
+    model_config = ConfigDict(defer_build=True)
+    
+    prompt: VideoPromptText = Field(
         ...,
-        min_length=1,
-        max_length=2000,
         description="Text prompt describing animation/motion for the image",
         examples=["Panning wide shot with gentle motion"],
     )
-    config: Optional[VideoGenerationConfig] = Field(
-        default_factory=VideoGenerationConfig,
+    config: VideoGenerationConfig | None = Field(
+        default=DEFAULT_VIDEO_CONFIG,
         description="Video generation configuration",
     )
 
@@ -120,15 +128,15 @@ class VideoGenerationResponse(BaseModel):
         default=OperationStatus.PENDING,
         description="Current status of the generation",
     )
-    video_url: Optional[str] = Field(
+    video_url: str | None = Field(
         None,
         description="URL of the generated video (when completed)",
     )
-    video_b64: Optional[str] = Field(
+    video_b64: str | None = Field(
         None,
         description="Base64 encoded video data (when completed)",
     )
-    error_message: Optional[str] = Field(
+    error_message: str | None = Field(
         None,
         description="Error message if generation failed",
     )
@@ -137,6 +145,10 @@ class VideoGenerationResponse(BaseModel):
 class VideoOperationStatusRequest(BaseModel):
     """Request schema for checking operation status."""
     
+    # Not mounted on a route (the endpoint takes form/path params), so
+    # build the validator on first use
+    model_config = ConfigDict(defer_build=True)
+    
     operation_id: str = Field(
         ...,
         description="Operation ID returned from generate request",
@@ -158,15 +170,15 @@ class VideoOperationStatusResponse(BaseModel):
         ...,
         description="Current status of the operation",
     )
-    video_url: Optional[str] = Field(
+    video_url: str | None = Field(
         None,
         description="URL of the generated video (when completed)",
     )
-    video_b64: Optional[str] = Field(
+    video_b64: str | None = Field(
         None,
         description="Base64 encoded video data (when completed)",
     )
-    error_message: Optional[str] = Field(
+    error_message: str | None = Field(
         None,
         description="Error message if generation failed",
     )
@@ -1,10 +1,9 @@
 """Service for Google 'Nano Banana Pro' (Gemini/Imagen) image features."""
 
 import logging
-from typing import Optional
 
 import google.generativeai as genai
-from PIL import Image
+from fastapi.concurrency import run_in_threadpool
 
 from app.config import settings
 
@@ -22,6 +21,13 @@ class ImageService:
             logger.warning("GOOGLE_API_KEY not set. Image features will fail.")
             
         self.model_name = settings.GOOGLE_IMAGE_MODEL
+        self._model = None
+
+    def _get_model(self):
+        """Create the image model on first use and reuse it afterwards."""
+        if self._model is None:
+            self._model = genai.ImageGenerationModel(self.model_name)
+        return self._model
 
     async def generate_image(self, prompt: str) -> str:
         """
@@ -57,8 +63,10 @@ class ImageService:
             # in this environment, I will stub the logic that WOULD exist.
             
             # Assuming usage of genai.ImageGenerationModel (available in newer SDKs)
-            model = genai.ImageGenerationModel(self.model_name)
-            response = model.generate_images(
+            # The SDK call blocks, so keep it off the event loop
+            model = self._get_model()
+            response = await run_in_threadpool(
+                model.generate_images,
                 prompt=prompt,
                 number_of_images=1
             )
@@ -72,7 +80,7 @@ class ImageService:
             return response.images[0] # This object usually is bytes or PIL image
 
         except Exception as e:
-            logger.error(f"Image generation failed: {e}")
+            logger.error("Image generation failed: %s", e)
             raise e
 
     async def edit_image(self, prompt: str, input_image_bytes: bytes) -> str:
@@ -87,11 +95,14 @@ class ImageService:
             Base64 encoded string of the edited image.
         """
         try:
-            # Load bytes into PIL Image
+            # Load bytes into PIL Image. Decoding is CPU-bound, so if the SDK
+            # needs a PIL image, open and .load() it in run_in_threadpool too
             # input_image = Image.open(io.BytesIO(input_image_bytes))
             
-            model = genai.ImageGenerationModel(self.model_name)
-            response = model.edit_image(
+            # The SDK call blocks, so keep it off the event loop
+            model = self._get_model()
+            response = await run_in_threadpool(
+                model.edit_image,
                 prompt=prompt,
                 image=input_image_bytes, # or PIL image depending on SDK
                 number_of_images=1
@@ -100,5 +111,5 @@ class ImageService:
             return response.images[0]
 
         except Exception as e:
-            logger.error(f"Image editing failed: {e}")
+            logger.error("Image editing failed: %s", e)
             raise e
@@ -1,15 +1,21 @@
 """Service for Google Lyria RealTime music generation."""
 
 import asyncio
-import base64
 import logging
 from typing import List, Optional
 
+try:
+    # SIMD-accelerated (AVX2/SSSE3) codec; output matches the stdlib
+    from pybase64 import b64encode as _b64encode
+except ImportError:
+    from base64 import b64encode as _b64encode
+
 from google import genai
 from google.genai import types
 
 from app.config import settings
 from app.schemas.music import (
+    DEFAULT_MUSIC_CONFIG,
     MusicGenerationConfig,
     MusicGenerationResponse,
     WeightedPrompt,
@@ -38,6 +44,10 @@ class MusicService:
         self.channels = 2
         self.bit_depth = 16
 
+    # Extra time allowed past the requested duration for the stream to
+    # deliver enough audio before generation is cut off
+    RECEIVE_GRACE_SECONDS = 2
+
     async def generate_music(
         self,
         prompts: List[WeightedPrompt],
@@ -48,7 +58,8 @@ class MusicService:
         Generate music from weighted prompts.
         
         This connects to Lyria RealTime via WebSocket, starts generation,
-        collects audio chunks for the specified duration, then returns.
+        collects audio chunks until the specified duration has been received
+        (or the stream ends or falls too far behind), then returns.
         
         Args:
             prompts: List of weighted prompts describing the music.
@@ -64,21 +75,36 @@ class MusicService:
         if not self.client:
             raise RuntimeError("Google API client not initialized")
         
-        config = config or MusicGenerationConfig()
-        audio_chunks: List[bytes] = []
+        config = config or DEFAULT_MUSIC_CONFIG
+        
+        # PCM16 stereo at 48kHz = 48000 * 2 channels * 2 bytes = 192000 bytes/sec
+        bytes_per_second = self.sample_rate_hz * self.channels * (self.bit_depth // 8)
+        
+        # Chunks are copied straight into one buffer sized for the requested
+        # duration; slice assignment past the end grows it for the final frame
+        target_bytes = duration_seconds * bytes_per_second
+        audio = bytearray(target_bytes)
+        received = 0
         
         try:
             async def receive_audio(session):
-                """Background task to collect audio chunks."""
-                nonlocal audio_chunks
-                try:
-                    async for message in session.receive():
-                        if hasattr(message, "server_content") and message.server_content:
-                            if hasattr(message.server_content, "audio_chunks"):
-                                for chunk in message.server_content.audio_chunks:
-                                    audio_chunks.append(chunk.data)
-                except asyncio.CancelledError:
-                    pass  # Expected when we stop receiving
+                """Background task to collect audio chunks up to target_bytes."""
+                nonlocal received
+                async for message in session.receive():
+                    # One getattr per frame instead of hasattr + re-lookup
+                    server_content = getattr(message, "server_content", None)
+                    if not server_content:
+                        continue
+                    audio_chunks = getattr(server_content, "audio_chunks", None)
+                    if not audio_chunks:
+                        continue
+                    for chunk in audio_chunks:
+                        data = chunk.data
+                        end = received + len(data)
+                        audio[received:end] = data
+                        received = end
+                    if received >= target_bytes:
+                        return
 
             # Connect to Lyria RealTime
             async with self.client.aio.live.music.connect(
@@ -87,64 +113,68 @@ class MusicService:
                 # Start receive task
                 receive_task = asyncio.create_task(receive_audio(session))
                 
-                # Set weighted prompts
-                await session.set_weighted_prompts(
-                    prompts=[
-                        types.WeightedPrompt(text=p.text, weight=p.weight)
-                        for p in prompts
-                    ]
-                )
+                # Set weighted prompts, collecting their texts in the same pass
+                sdk_prompts: List[types.WeightedPrompt] = []
+                prompts_used: List[str] = []
+                for p in prompts:
+                    sdk_prompts.append(types.WeightedPrompt(text=p.text, weight=p.weight))
+                    prompts_used.append(p.text)
+                await session.set_weighted_prompts(prompts=sdk_prompts)
                 
-                # Build music generation config
-                music_config = types.LiveMusicGenerationConfig(
+                # Build music generation config in one validated constructor call
+                config_fields = dict(
                     bpm=config.bpm,
                     temperature=config.temperature,
                     guidance=config.guidance,
+                    mute_bass=config.mute_bass,
+                    mute_drums=config.mute_drums,
+                    only_bass_and_drums=config.only_bass_and_drums,
+                    music_generation_mode=getattr(
+                        types.MusicGenerationMode,
+                        config.music_generation_mode.value,
+                        types.MusicGenerationMode.QUALITY,
+                    ),
                 )
-                
                 if config.density is not None:
-                    music_config.density = config.density
+                    config_fields["density"] = config.density
                 if config.brightness is not None:
-                    music_config.brightness = config.brightness
+                    config_fields["brightness"] = config.brightness
                 if config.scale is not None:
-                    music_config.scale = getattr(types.Scale, config.scale.value, None)
+                    config_fields["scale"] = getattr(types.Scale, config.scale.value, None)
                 
-                music_config.mute_bass = config.mute_bass
-                music_config.mute_drums = config.mute_drums
-                music_config.only_bass_and_drums = config.only_bass_and_drums
-                music_config.music_generation_mode = getattr(
-                    types.MusicGenerationMode, 
-                    config.music_generation_mode.value,
-                    types.MusicGenerationMode.QUALITY,
-                )
+                music_config = types.LiveMusicGenerationConfig(**config_fields)
                 
                 await session.set_music_generation_config(config=music_config)
                 
                 # Start streaming
                 await session.play()
                 
-                # Collect audio for the specified duration
-                await asyncio.sleep(duration_seconds)
+                # Collect audio until the requested duration has arrived,
+                # giving up on a stream that falls too far behind
+                try:
+                    await asyncio.wait_for(
+                        receive_task,
+                        timeout=duration_seconds + self.RECEIVE_GRACE_SECONDS,
+                    )
+                except asyncio.TimeoutError:
+                    logger.warning(
+                        "Lyria stream delivered %d of %d bytes before timing out",
+                        received,
+                        target_bytes,
+                    )
                 
                 # Stop and cleanup
                 await session.stop()
-                receive_task.cancel()
-                try:
-                    await receive_task
-                except asyncio.CancelledError:
-                    pass
 
-            # Combine all audio chunks
-            combined_audio = b"".join(audio_chunks)
-            audio_b64 = base64.b64encode(combined_audio).decode("utf-8")
+            # Drop the unused tail of the preallocated buffer
+            del audio[received:]
+            audio_b64 = _b64encode(audio).decode("ascii")
             
             # Calculate actual duration based on audio data
-            # PCM16 stereo at 48kHz = 48000 * 2 channels * 2 bytes = 192000 bytes/sec
-            bytes_per_second = self.sample_rate_hz * self.channels * (self.bit_depth // 8)
-            actual_duration = len(combined_audio) / bytes_per_second if bytes_per_second > 0 else 0
+            actual_duration = len(audio) / bytes_per_second if bytes_per_second > 0 else 0
             
             logger.info(
-                f"Generated {actual_duration:.2f}s of music from {len(prompts)} prompts"
+                "Generated %.2fs of music from %d prompts", actual_duration, len(prompts)
             )
             
             return MusicGenerationResponse(
@@ -153,11 +183,11 @@ class MusicService:
                 channels=self.channels,
                 bit_depth=self.bit_depth,
                 duration_seconds=actual_duration,
-                prompts_used=[p.text for p in prompts],
+                prompts_used=prompts_used,
             )
 
         except Exception as e:
-            logger.error(f"Music generation failed: {e}")
+            logger.error("Music generation failed: %s", e)
             raise e
 
     async def generate_music_simple(
@@ -1,36 +1,116 @@
 """Rate limiting service for AI endpoints."""
 
 import logging
-from datetime import datetime, timezone
-from typing import Dict, Tuple
+import math
+import time
+from typing import List
+
+from cachetools import TTLCache
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # Only needed when REDIS_URL is configured
+    aioredis = None
 
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Reported by get_remaining_requests when AI_DAILY_RATE_LIMIT disables limiting
+UNLIMITED_REMAINING = 10**9
+
 
 class RateLimitService:
     """
     Service to track and limit AI usage per user.
     
+    Each user gets a token bucket holding up to AI_DAILY_RATE_LIMIT tokens
+    that refills continuously over a day, so a user can burst up to the
+    limit and then regains one request every day / limit. This is a rolling
+    window, unlike RedisRateLimitService's fixed UTC-day counter.
+    
+    A user found without a whole token is remembered with the time their
+    next token arrives, so until then they are rejected without refilling
+    or even looking up their bucket.
+    
+    Storage is capped at MAX_TRACKED_USERS. Past that many active users the
+    limit loosens: an evicted user comes back with a full bucket and no
+    remembered block, even if they had used up their tokens.
+    
     NOTE: This is an in-memory implementation for the MVP.
     In a production environment with multiple workers/instances,
-    this should be backed by Redis or a similar shared store.
+    set REDIS_URL to use RedisRateLimitService instead.
     """
     
+    # Time for an empty bucket to refill completely
+    REFILL_PERIOD_SECONDS = 86400
+    
+    # Most buckets kept at once; the least recently used are dropped first,
+    # which resets them to full, so size this above the active user count
+    MAX_TRACKED_USERS = 100_000
+    
     def __init__(self):
-        # Maps user_uid to (date_string, count)
-        # Example: "user123": ("2023-10-27", 10)
-        self._usage: Dict[str, Tuple[str, int]] = {}
+        # Maps user_uid to a mutable [tokens, last_refill] bucket, updated
+        # in place so the hot path doesn't rebuild and re-insert a tuple.
+        # last_refill is a time.monotonic() timestamp.
+        # Example: "user123": [40.5, 1234.5]
+        # A bucket left alone for a full refill period is full again, which
+        # is exactly what a missing bucket means, so expiring idle ones is
+        # lossless. Evicting a bucket at maxsize is not: it forgets spent
+        # tokens.
+        self._buckets: TTLCache = TTLCache(
+            maxsize=self.MAX_TRACKED_USERS,
+            ttl=self.REFILL_PERIOD_SECONDS,
+        )
+        # Maps user_uid to the time.monotonic() at which they get a token back.
+        # That is never more than a refill period away, so entries expire then.
+        self._blocked: TTLCache = TTLCache(
+            maxsize=self.MAX_TRACKED_USERS,
+            ttl=self.REFILL_PERIOD_SECONDS,
+        )
         self._limit = settings.AI_DAILY_RATE_LIMIT
 
-    def _get_today_str(self) -> str:
-        """Get current date as YYYY-MM-DD string (UTC)."""
-        return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    def _refill(self, user_id: str) -> List[float]:
+        """Top up the user's bucket for the time elapsed and return it."""
+        now = time.monotonic()
+        bucket = self._buckets.get(user_id)
+        
+        if bucket is None:
+            bucket = self._buckets[user_id] = [float(self._limit), now]
+        else:
+            refill_rate = self._limit / self.REFILL_PERIOD_SECONDS
+            bucket[0] = min(self._limit, bucket[0] + (now - bucket[1]) * refill_rate)
+            bucket[1] = now
+            # Re-set to push back the bucket's expiry while it is in use
+            self._buckets[user_id] = bucket
+        
+        return bucket
+
+    def _available(self, user_id: str) -> float:
+        """Get the user's current tokens without creating a bucket."""
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            return float(self._limit)
+        
+        refill_rate = self._limit / self.REFILL_PERIOD_SECONDS
+        return min(self._limit, bucket[0] + (time.monotonic() - bucket[1]) * refill_rate)
 
-    def check_limit(self, user_id: str) -> bool:
+    def _blocked_for(self, user_id: str) -> float:
+        """Get the seconds a remembered block has left (0 if not blocked)."""
+        until = self._blocked.get(user_id)
+        if until is None:
+            return 0.0
+        
+        remaining = until - time.monotonic()
+        if remaining > 0:
+            return remaining
+        
+        del self._blocked[user_id]
+        return 0.0
+
+    async def check_limit(self, user_id: str) -> bool:
         """
-        Check if the user has reached their daily limit.
+        Check if the user has a request token available.
         
         Args:
             user_id: The unique identifier of the user.
@@ -38,55 +118,157 @@ class RateLimitService:
         Returns:
             True if the user is allowed to make a request, False otherwise.
         """
-        today = self._get_today_str()
-        
-        if user_id not in self._usage:
-            # User hasn't made any requests yet (or not today if cleanup happened)
+        # A limit of 0 (or less) turns rate limiting off
+        if self._limit <= 0:
             return True
+        if self._blocked_for(user_id):
+            return False
         
-        last_date, count = self._usage[user_id]
-        
-        # If the stored date is different from today, their count resets
-        if last_date != today:
+        tokens = self._available(user_id)
+        if tokens >= 1:
             return True
-            
-        # Check against the limit
-        return count < self._limit
+        
+        # Remember when the next whole token arrives
+        refill_rate = self._limit / self.REFILL_PERIOD_SECONDS
+        self._blocked[user_id] = time.monotonic() + (1 - tokens) / refill_rate
+        return False
 
-    def increment_usage(self, user_id: str) -> None:
+    async def increment_usage(self, user_id: str, count: int = 1) -> None:
         """
-        Increment the usage count for a user.
+        Take count tokens from the user's bucket, refilling it once.
         
         Should be called after a successful (or attempted) AI request.
         """
-        today = self._get_today_str()
-        
-        if user_id not in self._usage:
-            self._usage[user_id] = (today, 1)
-        else:
-            last_date, count = self._usage[user_id]
-            
-            if last_date != today:
-                # New day, reset count
-                self._usage[user_id] = (today, 1)
-            else:
-                # Same day, increment
-                self._usage[user_id] = (today, count + 1)
-                
-        # Optional: Clean up old entries periodically to prevent memory leak
-        # For MVP/small scale, this might not be strictly necessary, 
-        # but good practice would be to have a cleanup job.
-
-    def get_remaining_requests(self, user_id: str) -> int:
-        """Get the number of remaining requests for the user today."""
-        today = self._get_today_str()
-        
-        if user_id not in self._usage:
+        if self._limit <= 0:
+            return
+
+        bucket = self._refill(user_id)
+        bucket[0] = max(0.0, bucket[0] - count)
+        # Spending tokens pushes back any remembered unblock time
+        self._blocked.pop(user_id, None)
+
+    async def get_remaining_requests(self, user_id: str) -> int:
+        """Get the number of requests the user can make right now."""
+        if self._limit <= 0:
+            return UNLIMITED_REMAINING
+        if self._blocked_for(user_id):
+            return 0
+        return int(self._available(user_id))
+
+    async def get_retry_after_seconds(self, user_id: str) -> int:
+        """Get the seconds until the user's bucket holds a whole token again."""
+        if self._limit <= 0:
+            return 0
+
+        blocked_for = self._blocked_for(user_id)
+        if blocked_for:
+            return math.ceil(blocked_for)
+
+        missing = 1 - self._available(user_id)
+        if missing <= 0:
+            return 0
+        return math.ceil(missing * self.REFILL_PERIOD_SECONDS / self._limit)
+
+
+class RedisRateLimitService:
+    """
+    Rate limiter backed by Redis, shared by all workers and instances.
+
+    Each user gets one counter per UTC day, so days roll over without any
+    reset logic. Counters expire after two days to bound memory.
+
+    Counts only grow within a day, so once a user is seen at the limit the
+    worker remembers it locally and rejects their further requests for the
+    rest of the day without a Redis round trip.
+    """
+
+    # Keep yesterday's counter around across the day boundary
+    KEY_TTL_SECONDS = 2 * 86400
+
+    # Most users remembered as blocked per worker
+    MAX_BLOCKED_USERS = 100_000
+
+    def __init__(self, redis_url: str):
+        if aioredis is None:
+            raise RuntimeError("REDIS_URL is set but the 'redis' package is not installed")
+
+        # Connections are opened lazily on the first command
+        self._redis = aioredis.from_url(redis_url)
+        self._limit = settings.AI_DAILY_RATE_LIMIT
+        # Maps user_uid to the UTC day on which they reached the limit
+        self._blocked: TTLCache = TTLCache(maxsize=self.MAX_BLOCKED_USERS, ttl=86400)
+
+    def _today(self) -> int:
+        """Get the current UTC day as days since the Unix epoch."""
+        return int(time.time()) // 86400
+
+    def _key(self, user_id: str, day: int | None = None) -> str:
+        """Build the counter key for the user's UTC day (today by default)."""
+        return f"rl:{user_id}:{self._today() if day is None else day}"
+
+    async def _get_count(self, user_id: str) -> int:
+        """
+        Get the user's request count for today (0 if none).
+
+        Users already known to be blocked today are reported at the limit
+        without querying Redis.
+        """
+        today = self._today()
+        if self._blocked.get(user_id) == today:
             return self._limit
-            
-        last_date, count = self._usage[user_id]
+
+        count = await self._redis.get(self._key(user_id, today))
+        count = int(count) if count is not None else 0
+        if count >= self._limit:
+            self._blocked[user_id] = today
+        return count
+
+    async def check_limit(self, user_id: str) -> bool:
+        """
+        Check if the user has reached their daily limit.
         
-        if last_date != today:
-            return self._limit
+        Args:
+            user_id: The unique identifier of the user.
             
-        return max(0, self._limit - count)
+        Returns:
+            True if the user is allowed to make a request, False otherwise.
+        """
+        # A limit of 0 (or less) turns rate limiting off without a round trip
+        if self._limit <= 0:
+            return True
+        return await self._get_count(user_id) < self._limit
+
+    async def increment_usage(self, user_id: str, count: int = 1) -> None:
+        """Add count to the user's usage in one pipelined round trip."""
+        if self._limit <= 0:
+            return
+
+        key = self._key(user_id)
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.incr(key, count)
+            pipe.expire(key, self.KEY_TTL_SECONDS)
+            await pipe.execute()
+
+    async def get_remaining_requests(self, user_id: str) -> int:
+        """Get the number of remaining requests for the user today."""
+        if self._limit <= 0:
+            return UNLIMITED_REMAINING
+        return max(0, self._limit - await self._get_count(user_id))
+
+    async def get_retry_after_seconds(self, user_id: str) -> int:
+        """Get the seconds until a blocked user's counter resets at UTC midnight."""
+        if await self.check_limit(user_id):
+            return 0
+        return 86400 - int(time.time()) % 86400
+
+
+def _create_rate_limit_service() -> RateLimitService | RedisRateLimitService:
+    """Use Redis when configured, otherwise the in-process MVP limiter."""
+    if settings.REDIS_URL:
+        logger.info("Using Redis-backed AI rate limiting")
+        return RedisRateLimitService(settings.REDIS_URL)
+    return RateLimitService()
+
+
+# Shared instance; the service holds no per-request state
+rate_limit_service = _create_rate_limit_service()
@@ -0,0 +1,59 @@
+"""Exact-match response cache for AI endpoints."""
+
+import hashlib
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import orjson
+
+
+class ResponseCache:
+    """
+    Cache AI outputs keyed by a hash of the prompt inputs.
+
+    Only exact matches are served, so a cached answer is always one the model
+    produced for the very same template, model settings, and payload.
+
+    NOTE: This is an in-memory implementation for the MVP, like
+    RateLimitService. With multiple workers it should move to Redis.
+    """
+
+    def __init__(self, max_entries: int = 10_000):
+        # Maps key to (expires_at, value)
+        self._entries: Dict[str, Tuple[float, str]] = {}
+        self._max_entries = max_entries
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Build a fixed-size cache key from the given prompt components."""
+        raw = orjson.dumps(parts, option=orjson.OPT_SORT_KEYS, default=str)
+        return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value for a key, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+
+        return value
+
+    def set(self, key: str, value: str, ttl_seconds: float) -> None:
+        """Store a value for ttl_seconds, evicting the oldest entry when full."""
+        if key not in self._entries and len(self._entries) >= self._max_entries:
+            # Dicts keep insertion order, so the first key is the oldest
+            self._entries.pop(next(iter(self._entries)))
+
+        self._entries[key] = (time.monotonic() + ttl_seconds, value)
+
+    def clear(self) -> None:
+        """Drop all cached entries."""
+        self._entries.clear()
+
+
+# Shared instance used by the AI endpoints
+response_cache = ResponseCache()
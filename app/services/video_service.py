@@ -1,15 +1,22 @@
 """Service for Google Veo 3.1 video generation."""
 
 import asyncio
-import base64
 import logging
-from typing import Optional, Tuple
+import re
+from typing import Any, Optional, Tuple
+
+try:
+    # SIMD-accelerated (AVX2/SSSE3) codec; output matches the stdlib
+    from pybase64 import b64decode as _b64decode, b64encode as _b64encode
+except ImportError:
+    from base64 import b64decode as _b64decode, b64encode as _b64encode
 
 from google import genai
-from google.genai import types
+from google.genai import errors, types
 
 from app.config import settings
 from app.schemas.video import (
+    DEFAULT_VIDEO_CONFIG,
     OperationStatus,
     VideoGenerationConfig,
     VideoGenerationResponse,
@@ -22,6 +29,9 @@ logger = logging.getLogger(__name__)
 class VideoService:
     """Service to handle video generation using Google Veo 3.1."""
 
+    # First wait in generate_video_sync before the backoff doubles it
+    INITIAL_POLL_DELAY_SECONDS = 2
+
     def __init__(self):
         """Initialize the service with API key."""
         if settings.GOOGLE_API_KEY:
@@ -31,8 +41,28 @@ class VideoService:
             self.client = None
             
         self.model_name = settings.GOOGLE_VIDEO_MODEL
-        # Store operations for status polling
-        self._operations: dict = {}
+
+    @staticmethod
+    def _operation_id(operation: Any) -> str:
+        """
+        Get the ID clients poll with: the operation's Google resource name.
+
+        Google keeps the canonical operation state, so no server-side
+        registry is needed and any worker can answer a status poll.
+        """
+        if not operation.name:
+            raise RuntimeError("Video generation did not return an operation name")
+        return operation.name
+
+    def _is_own_operation(self, operation_id: str) -> bool:
+        """
+        Check that an ID names one of this model's operations.
+
+        The SDK puts the name straight into the request path and sends it
+        with the server's API key, so anything else must never reach it.
+        """
+        model = re.escape(self.model_name.removeprefix("models/"))
+        return re.fullmatch(rf"models/{model}/operations/[^/]+", operation_id) is not None
 
     async def generate_video(
         self,
@@ -56,7 +86,7 @@ class VideoService:
             raise RuntimeError("Google API client not initialized")
         
         try:
-            config = config or VideoGenerationConfig()
+            config = config or DEFAULT_VIDEO_CONFIG
             
             # Build generation config
             gen_config = types.GenerateVideosConfig(
@@ -78,11 +108,9 @@ class VideoService:
                 config=gen_config,
             )
             
-            # Store operation for later polling
-            operation_id = str(id(operation))
-            self._operations[operation_id] = operation
+            operation_id = self._operation_id(operation)
             
-            logger.info(f"Started video generation operation: {operation_id}")
+            logger.info("Started video generation operation: %s", operation_id)
             
             return VideoGenerationResponse(
                 operation_id=operation_id,
@@ -90,7 +118,7 @@ class VideoService:
             )
 
         except Exception as e:
-            logger.error(f"Video generation failed: {e}")
+            logger.error("Video generation failed: %s", e)
             raise e
 
     async def generate_video_from_image(
@@ -114,7 +142,7 @@ class VideoService:
             raise RuntimeError("Google API client not initialized")
         
         try:
-            config = config or VideoGenerationConfig()
+            config = config or DEFAULT_VIDEO_CONFIG
             
             # Create image object from bytes
             image = types.Image(image_bytes=image_bytes)
@@ -139,10 +167,9 @@ class VideoService:
                 config=gen_config,
             )
             
-            operation_id = str(id(operation))
-            self._operations[operation_id] = operation
+            operation_id = self._operation_id(operation)
             
-            logger.info(f"Started image-to-video generation: {operation_id}")
+            logger.info("Started image-to-video generation: %s", operation_id)
             
             return VideoGenerationResponse(
                 operation_id=operation_id,
@@ -150,7 +177,7 @@ class VideoService:
             )
 
         except Exception as e:
-            logger.error(f"Image-to-video generation failed: {e}")
+            logger.error("Image-to-video generation failed: %s", e)
             raise e
 
     async def get_operation_status(
@@ -161,40 +188,47 @@ class VideoService:
         Check the status of a video generation operation.
         
         Args:
-            operation_id: The operation ID to check.
+            operation_id: The operation ID (resource name) to check.
             
         Returns:
             VideoOperationStatusResponse with current status.
         """
-        if operation_id not in self._operations:
-            return VideoOperationStatusResponse(
-                operation_id=operation_id,
-                done=False,
-                status=OperationStatus.FAILED,
-                error_message="Operation not found",
-            )
+        if not self.client:
+            raise RuntimeError("Google API client not initialized")
+        
+        not_found = VideoOperationStatusResponse(
+            operation_id=operation_id,
+            done=False,
+            status=OperationStatus.FAILED,
+            error_message="Operation not found",
+        )
+        if not self._is_own_operation(operation_id):
+            return not_found
         
         try:
-            operation = self._operations[operation_id]
-            
-            # Refresh operation status
-            operation = self.client.operations.get(operation)
-            self._operations[operation_id] = operation
+            # Fetch the operation by name without blocking the event loop
+            try:
+                operation = await self.client.aio.operations.get(
+                    types.GenerateVideosOperation(name=operation_id)
+                )
+            except errors.ClientError as e:
+                if e.code != 404:
+                    raise
+                return not_found
             
             if operation.done:
                 # Operation completed
                 try:
                     generated_video = operation.response.generated_videos[0]
                     
-                    # Download the video
-                    self.client.files.download(file=generated_video.video)
-                    
-                    # Get video bytes and encode to base64
-                    video_bytes = generated_video.video._downloaded_bytes
-                    video_b64 = base64.b64encode(video_bytes).decode("utf-8")
+                    # Download the video through the async client so other
+                    # requests keep being served during the transfer
+                    video_bytes = await self.client.aio.files.download(
+                        file=generated_video.video
+                    )
                     
-                    # Clean up stored operation
-                    del self._operations[operation_id]
+                    # Encode to base64
+                    video_b64 = _b64encode(video_bytes).decode("ascii")
                     
                     return VideoOperationStatusResponse(
                         operation_id=operation_id,
@@ -203,7 +237,7 @@ class VideoService:
                         video_b64=video_b64,
                     )
                 except Exception as e:
-                    logger.error(f"Failed to retrieve video: {e}")
+                    logger.error("Failed to retrieve video: %s", e)
                     return VideoOperationStatusResponse(
                         operation_id=operation_id,
                         done=True,
@@ -218,7 +252,7 @@ class VideoService:
                 )
 
         except Exception as e:
-            logger.error(f"Failed to get operation status: {e}")
+            logger.error("Failed to get operation status: %s", e)
             return VideoOperationStatusResponse(
                 operation_id=operation_id,
                 done=False,
@@ -240,7 +274,8 @@ class VideoService:
             prompt: Text description of the video.
             config: Video generation configuration.
             timeout_seconds: Maximum time to wait.
-            poll_interval: Seconds between status checks.
+            poll_interval: Maximum seconds between status checks. Polling
+                starts at INITIAL_POLL_DELAY_SECONDS and doubles up to this.
             
         Returns:
             Tuple of (video_bytes, operation_id).
@@ -253,16 +288,19 @@ class VideoService:
         operation_id = response.operation_id
         
         elapsed = 0
+        delay = min(self.INITIAL_POLL_DELAY_SECONDS, poll_interval)
         while elapsed < timeout_seconds:
             status = await self.get_operation_status(operation_id)
             
             if status.done:
                 if status.status == OperationStatus.COMPLETED and status.video_b64:
-                    return base64.b64decode(status.video_b64), operation_id
+                    return _b64decode(status.video_b64), operation_id
                 else:
                     raise Exception(status.error_message or "Video generation failed")
             
-            await asyncio.sleep(poll_interval)
-            elapsed += poll_interval
+            await asyncio.sleep(delay)
+            elapsed += delay
+            # Back off so quick jobs return fast and slow ones poll less
+            delay = min(delay * 2, poll_interval)
         
         raise TimeoutError(f"Video generation timed out after {timeout_seconds}s")
@@ -3,12 +3,35 @@ AI-Powered Forum API - Entry Point
 
 Run with: uvicorn main:app --reload
 Or: python main.py
+
+python main.py runs on uvloop with the httptools parser (both ship with
+uvicorn[standard]). With ENV=prod it drops auto-reload and starts
+WEB_CONCURRENCY worker processes (default 4):
+    ENV=prod WEB_CONCURRENCY=4 python main.py
+
+Each worker keeps its own in-memory rate limits and caches, so set REDIS_URL
+to share rate limits across workers.
 """
 
+import os
+
 import uvicorn
 
 # Import app from the app package
 from app.main import app  # noqa: F401
 
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
+    if os.getenv("ENV") == "prod":
+        # Reload only supports a single process, so workers replace it
+        run_options = {"workers": int(os.getenv("WEB_CONCURRENCY", "4"))}
+    else:
+        run_options = {"reload": True}
+
+    uvicorn.run(
+        "app.main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        **run_options,
+    )
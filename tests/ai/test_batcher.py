@@ -0,0 +1,155 @@
+"""Tests for the chain micro-batcher."""
+
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.ai.batcher import ChainBatcher
+
+
+def _blocking_chain():
+    """Build a chain whose first ainvoke call blocks until released."""
+    chain = AsyncMock()
+    release = asyncio.Event()
+
+    async def ainvoke(payload):
+        await release.wait()
+        return {"text": payload["content"]}
+
+    chain.ainvoke.side_effect = ainvoke
+    return chain, release
+
+
+@pytest.mark.asyncio
+async def test_single_submit_uses_ainvoke():
+    """Test that a lone request is sent through ainvoke without waiting."""
+    chain = AsyncMock()
+    chain.ainvoke.return_value = {"text": "single"}
+    batcher = ChainBatcher(max_wait_seconds=60)
+
+    result = await asyncio.wait_for(batcher.submit(chain, {"content": "a"}), timeout=1)
+
+    assert result == {"text": "single"}
+    chain.ainvoke.assert_awaited_once_with({"content": "a"})
+    chain.abatch.assert_not_called()
+    assert not batcher._tasks
+
+
+@pytest.mark.asyncio
+async def test_requests_during_a_call_are_batched():
+    """Test that requests queued behind an in-flight call share one abatch."""
+    chain, release = _blocking_chain()
+    chain.abatch.return_value = [{"text": "one"}, {"text": "two"}]
+    batcher = ChainBatcher(max_wait_seconds=60)
+
+    first = asyncio.create_task(batcher.submit(chain, {"content": "a"}))
+    await asyncio.sleep(0)
+    queued = asyncio.gather(
+        batcher.submit(chain, {"content": "b"}),
+        batcher.submit(chain, {"content": "c"}),
+    )
+    await asyncio.sleep(0)
+
+    # The queued requests go out as soon as the in-flight call finishes
+    release.set()
+    results = await asyncio.wait_for(queued, timeout=1)
+
+    assert await first == {"text": "a"}
+    assert results == [{"text": "one"}, {"text": "two"}]
+    chain.abatch.assert_awaited_once_with(
+        [{"content": "b"}, {"content": "c"}], return_exceptions=True
+    )
+
+
+@pytest.mark.asyncio
+async def test_batch_errors_are_routed_to_their_caller():
+    """Test that a failed item only fails its own request."""
+    chain, release = _blocking_chain()
+    chain.abatch.return_value = [{"text": "ok"}, ValueError("boom")]
+    batcher = ChainBatcher(max_wait_seconds=0.01)
+
+    first = asyncio.create_task(batcher.submit(chain, {"content": "a"}))
+    await asyncio.sleep(0)
+    results = await asyncio.gather(
+        batcher.submit(chain, {"content": "b"}),
+        batcher.submit(chain, {"content": "c"}),
+        return_exceptions=True,
+    )
+    release.set()
+    await first
+
+    assert results[0] == {"text": "ok"}
+    assert isinstance(results[1], ValueError)
+
+
+@pytest.mark.asyncio
+async def test_full_batch_flushes_immediately():
+    """Test that reaching max_batch_size dispatches without waiting."""
+    chain, release = _blocking_chain()
+    chain.abatch.return_value = [{"text": "x"}, {"text": "y"}]
+    batcher = ChainBatcher(max_batch_size=2, max_wait_seconds=60)
+
+    first = asyncio.create_task(batcher.submit(chain, {"content": "a"}))
+    await asyncio.sleep(0)
+    results = await asyncio.wait_for(
+        asyncio.gather(
+            batcher.submit(chain, {"content": "b"}),
+            batcher.submit(chain, {"content": "c"}),
+        ),
+        timeout=1,
+    )
+
+    assert results == [{"text": "x"}, {"text": "y"}]
+    release.set()
+    await first
+
+
+@pytest.mark.asyncio
+async def test_early_flush_cancels_its_timer():
+    """Test that a full batch's timer does not cut the next batch short."""
+    chain, release = _blocking_chain()
+    chain.abatch.return_value = [{"text": "x"}, {"text": "y"}]
+    batcher = ChainBatcher(max_batch_size=2, max_wait_seconds=0.2)
+    loop = asyncio.get_running_loop()
+
+    first = asyncio.create_task(batcher.submit(chain, {"content": "a"}))
+    await asyncio.sleep(0)
+    start = loop.time()
+    await asyncio.gather(
+        batcher.submit(chain, {"content": "b"}),
+        batcher.submit(chain, {"content": "c"}),
+    )
+
+    # Queued after the early flush, so it waits its own full window
+    await asyncio.sleep(0.15)
+    dispatched_at = []
+
+    async def record_dispatch(payload):
+        dispatched_at.append(loop.time())
+        return {"text": payload["content"]}
+
+    chain.ainvoke.side_effect = record_dispatch
+    assert await batcher.submit(chain, {"content": "d"}) == {"text": "d"}
+    assert dispatched_at[0] - start >= 0.3
+
+    release.set()
+    await first
+
+
+@pytest.mark.asyncio
+async def test_cancelled_dispatch_cancels_waiting_callers():
+    """Test that callers do not hang when their batch task is cancelled."""
+    chain, _ = _blocking_chain()
+    batcher = ChainBatcher()
+
+    caller = asyncio.create_task(batcher.submit(chain, {"content": "a"}))
+    await asyncio.sleep(0)
+    assert len(batcher._tasks) == 1
+
+    for task in batcher._tasks:
+        task.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(caller, timeout=1)
+    assert not batcher._tasks
@@ -0,0 +1,44 @@
+"""Tests for upload helpers."""
+
+import io
+
+import pytest
+from fastapi import UploadFile
+
+from app.api.uploads import read_upload
+
+DATA = b"0123456789" * 100
+
+
+class ChunkedFile(io.BytesIO):
+    """A file whose readinto returns at most 64 bytes per call."""
+
+    def readinto(self, buffer):
+        with memoryview(buffer) as view:
+            return super().readinto(view[:64])
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("size", [len(DATA), len(DATA) - 100, len(DATA) + 100])
+async def test_read_upload_returns_exact_contents(size):
+    """Test that short reads and a wrong reported size don't lose bytes."""
+    upload = UploadFile(ChunkedFile(DATA), size=size)
+
+    assert await read_upload(upload) == DATA
+
+
+class BareUpload:
+    """An upload exposing only the public UploadFile API, without _in_memory."""
+
+    def __init__(self, data):
+        self.file = io.BytesIO(data)
+        self.size = len(data)
+
+    async def seek(self, offset):
+        self.file.seek(offset)
+
+
+@pytest.mark.asyncio
+async def test_read_upload_without_in_memory_flag():
+    """Test that uploads read through the threadpool when the flag is absent."""
+    assert await read_upload(BareUpload(DATA)) == DATA
@@ -1,22 +1,27 @@
 """Tests for health check endpoints."""
 
+import pytest
 
-def test_health_check(client):
+
+@pytest.mark.asyncio
+async def test_health_check(client):
     """Test basic health check endpoint."""
-    response = client.get("/api/v1/health")
+    response = await client.get("/api/v1/health")
     assert response.status_code == 200
     assert response.json() == {"status": "healthy"}
 
 
-def test_readiness_check(client):
+@pytest.mark.asyncio
+async def test_readiness_check(client):
     """Test readiness check endpoint."""
-    response = client.get("/api/v1/health/ready")
+    response = await client.get("/api/v1/health/ready")
     assert response.status_code == 200
     assert response.json() == {"status": "ready"}
 
 
-def test_root_endpoint(client):
+@pytest.mark.asyncio
+async def test_root_endpoint(client):
     """Test root endpoint."""
-    response = client.get("/")
+    response = await client.get("/")
     assert response.status_code == 200
     assert "message" in response.json()
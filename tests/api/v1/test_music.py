@@ -1,34 +1,52 @@
 """Tests for music generation endpoints."""
 
-from unittest.mock import MagicMock, patch
+from types import SimpleNamespace
+from unittest.mock import patch
 
 import pytest
 from fastapi import status
 
+from app.api.v1.music import get_music_service
+from app.schemas.music import MusicGenerationResponse
+
+
+# Validated once; stubs derive per-call responses with model_copy
+_BASE_RESPONSE = MusicGenerationResponse(
+    audio_b64="YXVkaW9fZGF0YQ==",  # audio_data in base64
+    sample_rate_hz=48000,
+    channels=2,
+    bit_depth=16,
+    duration_seconds=30.0,
+    prompts_used=[],
+)
+
+
+async def fake_generate_music(prompts, config=None, duration_seconds=30):
+    """Stand-in for MusicService.generate_music that echoes the prompts."""
+    return _BASE_RESPONSE.model_copy(
+        update={
+            "duration_seconds": duration_seconds,
+            "prompts_used": [p.text for p in prompts],
+        }
+    )
+
+
+async def fake_generate_music_simple(prompt_text, bpm=120, duration_seconds=30):
+    """Stand-in for MusicService.generate_music_simple."""
+    return _BASE_RESPONSE.model_copy(
+        update={"duration_seconds": duration_seconds, "prompts_used": [prompt_text]}
+    )
+
 
 @pytest.mark.asyncio
-async def test_generate_music_success(authenticated_client):
+async def test_generate_music_success(authenticated_client, override_dependency):
     """Test successful music generation request."""
-    from app.main import app
-    from app.api.v1.music import get_music_service
-    from app.schemas.music import MusicGenerationResponse
-    
     # Create mock service
-    mock_service = MagicMock()
-    async def fake_generate(prompts, config=None, duration_seconds=30):
-        return MusicGenerationResponse(
-            audio_b64="YXVkaW9fZGF0YQ==",  # audio_data in base64
-            sample_rate_hz=48000,
-            channels=2,
-            bit_depth=16,
-            duration_seconds=30.0,
-            prompts_used=[p.text for p in prompts],
-        )
-    mock_service.generate_music = fake_generate
-    
-    app.dependency_overrides[get_music_service] = lambda: mock_service
-    
-    response = authenticated_client.post(
+    mock_service = SimpleNamespace(generate_music=fake_generate_music)
+    
+    override_dependency(get_music_service, lambda: mock_service)
+    
+    response = await authenticated_client.post(
         "/api/v1/ai/music/generate",
         json={
             "prompts": [
@@ -49,14 +67,12 @@ async def test_generate_music_success(authenticated_client):
     assert data["sample_rate_hz"] == 48000
     assert data["channels"] == 2
     assert "minimal techno" in data["prompts_used"]
-    
-    app.dependency_overrides = {}
 
 
 @pytest.mark.asyncio
 async def test_generate_music_unauthorized(client):
     """Test unauthorized music generation request."""
-    response = client.post(
+    response = await client.post(
         "/api/v1/ai/music/generate",
         json={
             "prompts": [{"text": "test", "weight": 1.0}],
@@ -66,27 +82,14 @@ async def test_generate_music_unauthorized(client):
 
 
 @pytest.mark.asyncio
-async def test_generate_music_simple_success(authenticated_client):
+async def test_generate_music_simple_success(authenticated_client, override_dependency):
     """Test simplified music generation endpoint."""
-    from app.main import app
-    from app.api.v1.music import get_music_service
-    from app.schemas.music import MusicGenerationResponse
-    
-    mock_service = MagicMock()
-    async def fake_generate(prompt_text, bpm=120, duration_seconds=30):
-        return MusicGenerationResponse(
-            audio_b64="YXVkaW9fZGF0YQ==",
-            sample_rate_hz=48000,
-            channels=2,
-            bit_depth=16,
-            duration_seconds=duration_seconds,
-            prompts_used=[prompt_text],
-        )
-    mock_service.generate_music_simple = fake_generate
-    
-    app.dependency_overrides[get_music_service] = lambda: mock_service
-    
-    response = authenticated_client.post(
+    
+    mock_service = SimpleNamespace(generate_music_simple=fake_generate_music_simple)
+    
+    override_dependency(get_music_service, lambda: mock_service)
+    
+    response = await authenticated_client.post(
         "/api/v1/ai/music/generate-simple",
         params={
             "prompt": "jazz piano",
@@ -98,14 +101,12 @@ async def test_generate_music_simple_success(authenticated_client):
     assert response.status_code == status.HTTP_200_OK
     data = response.json()
     assert "jazz piano" in data["prompts_used"]
-    
-    app.dependency_overrides = {}
 
 
 @pytest.mark.asyncio
 async def test_generate_music_simple_invalid_bpm(authenticated_client):
     """Test simple generation with invalid BPM."""
-    response = authenticated_client.post(
+    response = await authenticated_client.post(
         "/api/v1/ai/music/generate-simple",
         params={
             "prompt": "test",
@@ -114,14 +115,14 @@ async def test_generate_music_simple_invalid_bpm(authenticated_client):
         },
     )
     
-    assert response.status_code == status.HTTP_400_BAD_REQUEST
-    assert "bpm" in response.json()["detail"].lower()
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert response.json()["detail"][0]["loc"] == ["query", "bpm"]
 
 
 @pytest.mark.asyncio
 async def test_generate_music_simple_invalid_duration(authenticated_client):
     """Test simple generation with invalid duration."""
-    response = authenticated_client.post(
+    response = await authenticated_client.post(
         "/api/v1/ai/music/generate-simple",
         params={
             "prompt": "test",
@@ -130,14 +131,14 @@ async def test_generate_music_simple_invalid_duration(authenticated_client):
         },
     )
     
-    assert response.status_code == status.HTTP_400_BAD_REQUEST
-    assert "duration" in response.json()["detail"].lower()
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert response.json()["detail"][0]["loc"] == ["query", "duration_seconds"]
 
 
 @pytest.mark.asyncio
 async def test_generate_music_invalid_prompt(authenticated_client):
     """Test music generation with invalid prompts."""
-    response = authenticated_client.post(
+    response = await authenticated_client.post(
         "/api/v1/ai/music/generate",
         json={
             "prompts": [],  # Empty prompts
@@ -150,27 +151,14 @@ async def test_generate_music_invalid_prompt(authenticated_client):
 
 
 @pytest.mark.asyncio
-async def test_generate_music_with_full_config(authenticated_client):
+async def test_generate_music_with_full_config(authenticated_client, override_dependency):
     """Test music generation with all config options."""
-    from app.main import app
-    from app.api.v1.music import get_music_service
-    from app.schemas.music import MusicGenerationResponse
     
-    mock_service = MagicMock()
-    async def fake_generate(prompts, config=None, duration_seconds=30):
-        return MusicGenerationResponse(
-            audio_b64="YXVkaW9fZGF0YQ==",
-            sample_rate_hz=48000,
-            channels=2,
-            bit_depth=16,
-            duration_seconds=duration_seconds,
-            prompts_used=[p.text for p in prompts],
-        )
-    mock_service.generate_music = fake_generate
-    
-    app.dependency_overrides[get_music_service] = lambda: mock_service
-    
-    response = authenticated_client.post(
+    mock_service = SimpleNamespace(generate_music=fake_generate_music)
+    
+    override_dependency(get_music_service, lambda: mock_service)
+    
+    response = await authenticated_client.post(
         "/api/v1/ai/music/generate",
         json={
             "prompts": [{"text": "ambient", "weight": 1.0}],
@@ -189,24 +177,19 @@ async def test_generate_music_with_full_config(authenticated_client):
     )
     
     assert response.status_code == status.HTTP_200_OK
-    
-    app.dependency_overrides = {}
 
 
 @pytest.mark.asyncio
-async def test_generate_music_service_unavailable(authenticated_client):
+async def test_generate_music_service_unavailable(authenticated_client, override_dependency):
     """Test music generation when service is unavailable."""
-    from app.main import app
-    from app.api.v1.music import get_music_service
     
-    mock_service = MagicMock()
     async def fake_generate(prompts, config=None, duration_seconds=30):
         raise RuntimeError("Google API client not initialized")
-    mock_service.generate_music = fake_generate
+    mock_service = SimpleNamespace(generate_music=fake_generate)
     
-    app.dependency_overrides[get_music_service] = lambda: mock_service
+    override_dependency(get_music_service, lambda: mock_service)
     
-    response = authenticated_client.post(
+    response = await authenticated_client.post(
         "/api/v1/ai/music/generate",
         json={
             "prompts": [{"text": "test", "weight": 1.0}],
@@ -214,5 +197,3 @@ async def test_generate_music_service_unavailable(authenticated_client):
     )
     
     assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
-    
-    app.dependency_overrides = {}
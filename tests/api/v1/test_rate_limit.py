@@ -1,12 +1,18 @@
 """Tests for AI rate limiting."""
 
+import time
 from datetime import datetime
 from unittest.mock import MagicMock, patch
 
 import pytest
 from fastapi import status
 
-from app.services.rate_limiter import RateLimitService
+from app.services import rate_limiter
+from app.services.rate_limiter import (
+    UNLIMITED_REMAINING,
+    RateLimitService,
+    RedisRateLimitService,
+)
 
 # Mock user for testing
 TEST_USER_UID = "test_user_123"
@@ -23,69 +29,138 @@ def mock_rate_limit_settings():
 @pytest.fixture
 def rate_limit_service(mock_rate_limit_settings):
     """Create a rate limit service instance with mocked settings."""
-    service = RateLimitService()
-    # Reset usage for clean state
-    service._usage = {}
-    return service
+    return RateLimitService()
 
 
-def test_rate_limit_service_basic(rate_limit_service):
+@pytest.mark.asyncio
+async def test_rate_limit_service_basic(rate_limit_service):
     """Test basic service functionality."""
     user_id = "user1"
     
     # Initial check should pass
-    assert rate_limit_service.check_limit(user_id) is True
-    assert rate_limit_service.get_remaining_requests(user_id) == 5
+    assert await rate_limit_service.check_limit(user_id) is True
+    assert await rate_limit_service.get_remaining_requests(user_id) == 5
     
     # Increment usage
-    rate_limit_service.increment_usage(user_id)
-    assert rate_limit_service.get_remaining_requests(user_id) == 4
+    await rate_limit_service.increment_usage(user_id)
+    assert await rate_limit_service.get_remaining_requests(user_id) == 4
     
     # Increment to limit
-    for _ in range(4):
-        rate_limit_service.increment_usage(user_id)
-        
+    await rate_limit_service.increment_usage(user_id, count=4)
+    
     # Limit reached
-    assert rate_limit_service.get_remaining_requests(user_id) == 0
-    assert rate_limit_service.check_limit(user_id) is False
+    assert await rate_limit_service.get_remaining_requests(user_id) == 0
+    assert await rate_limit_service.check_limit(user_id) is False
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_service_bounds_tracked_users(mock_rate_limit_settings):
+    """Test that bucket storage is capped, evicting LRU users, and idle buckets expire."""
+    with patch.object(RateLimitService, "MAX_TRACKED_USERS", 2):
+        service = RateLimitService()
+    
+    for user_id in ("user1", "user2", "user3"):
+        await service.increment_usage(user_id)
+    
+    # The least recently used bucket was dropped; that user starts full again
+    assert len(service._buckets) == 2
+    assert "user1" not in service._buckets
+    assert await service.get_remaining_requests("user1") == 5
+    assert await service.get_remaining_requests("user3") == 4
+    
+    # Eviction forgets spent tokens too: past MAX_TRACKED_USERS active users
+    # the limit loosens, and a user who had run out is let back in
+    for user_id in ("spent", "user4", "user5"):
+        await service.increment_usage(user_id, count=5)
+        assert await service.check_limit(user_id) is False
+    assert "spent" not in service._buckets
+    assert "spent" not in service._blocked
+    assert await service.check_limit("spent") is True
+    assert await service.get_remaining_requests("spent") == 5
+    assert await service.check_limit("user5") is False
+    
+    # Buckets idle for a full refill period are expired
+    service._buckets.expire(time.monotonic() + service.REFILL_PERIOD_SECONDS)
+    assert len(service._buckets) == 0
 
 
-def test_rate_limit_service_reset(rate_limit_service):
-    """Test that limits reset on a new day."""
+@pytest.mark.asyncio
+async def test_rate_limit_service_reset(rate_limit_service):
+    """Test that an exhausted bucket refills over the day."""
     user_id = "user1"
+    now = time.monotonic()
     
-    # Use up the limit for "today"
-    for _ in range(5):
-        rate_limit_service.increment_usage(user_id)
+    with patch("app.services.rate_limiter.time.monotonic", return_value=now) as mock_clock:
+        # Use up the limit
+        for _ in range(5):
+            await rate_limit_service.increment_usage(user_id)
+        
+        assert await rate_limit_service.check_limit(user_id) is False
+        
+        # One fifth of a day later, one request's worth has refilled
+        mock_clock.return_value = now + 86400 / 5
+        assert await rate_limit_service.check_limit(user_id) is True
+        assert await rate_limit_service.get_remaining_requests(user_id) == 1
+        
+        # A full day later the bucket is full again, but never over the limit
+        mock_clock.return_value = now + 2 * 86400
+        assert await rate_limit_service.get_remaining_requests(user_id) == 5
+        
+        # Consuming starts from the refilled bucket
+        await rate_limit_service.increment_usage(user_id)
+        assert await rate_limit_service.get_remaining_requests(user_id) == 4
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_service_remembers_blocked_users(rate_limit_service):
+    """Test that a blocked user is rejected without touching their bucket."""
+    user_id = "user1"
+    now = time.monotonic()
     
-    assert rate_limit_service.check_limit(user_id) is False
+    with patch("app.services.rate_limiter.time.monotonic", return_value=now) as mock_clock:
+        await rate_limit_service.increment_usage(user_id, count=5)
+        assert await rate_limit_service.check_limit(user_id) is False
+        assert rate_limit_service._blocked[user_id] == now + 86400 / 5
+        
+        buckets = rate_limit_service._buckets
+        with patch.object(rate_limit_service, "_buckets", MagicMock(wraps=buckets)) as spy:
+            assert await rate_limit_service.check_limit(user_id) is False
+            assert await rate_limit_service.get_remaining_requests(user_id) == 0
+            assert spy.mock_calls == []
+        
+        # The block lapses exactly when the next token has refilled
+        mock_clock.return_value = now + 86400 / 5
+        assert await rate_limit_service.check_limit(user_id) is True
+        assert user_id not in rate_limit_service._blocked
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_service_retry_after(rate_limit_service):
+    """Test that Retry-After counts down to the next refilled token."""
+    user_id = "user1"
+    now = time.monotonic()
     
-    # Mock _get_today_str to return tomorrow's date
-    with patch.object(rate_limit_service, "_get_today_str", return_value="2099-01-01"):
-        # Should be allowed now (limit reset)
-        assert rate_limit_service.check_limit(user_id) is True
-        assert rate_limit_service.get_remaining_requests(user_id) == 5
+    with patch("app.services.rate_limiter.time.monotonic", return_value=now) as mock_clock:
+        assert await rate_limit_service.get_retry_after_seconds(user_id) == 0
         
-        # Incrementing starts fresh count
-        rate_limit_service.increment_usage(user_id)
-        assert rate_limit_service.get_remaining_requests(user_id) == 4
+        await rate_limit_service.increment_usage(user_id, count=5)
+        assert await rate_limit_service.get_retry_after_seconds(user_id) == 86400 / 5
+        
+        mock_clock.return_value = now + 3600
+        assert await rate_limit_service.get_retry_after_seconds(user_id) == 86400 / 5 - 3600
 
 
 @pytest.mark.asyncio
 async def test_rate_limit_endpoint_enforcement(authenticated_client):
     """Test rate limiting enforcement on API endpoints."""
-    from app.main import app
-    
-    # Override the rate limit service dependency with one that has a limit of 2
-    mock_service = RateLimitService()
-    mock_service._limit = 2
-    
-    # Override dependency
-    from app.api.deps import get_rate_limit_service
-    app.dependency_overrides[get_rate_limit_service] = lambda: mock_service
-    
-    # Mock the summarizer chain to avoid real LLM calls
-    with patch("app.api.v1.ai.summarizer.create_summarizer_chain") as mock_chain:
+    # Give the shared rate limit service a limit of 2 and a clean slate
+    shared_service = rate_limiter.rate_limit_service
+    with patch.object(shared_service, "_limit", 2), \
+         patch.object(shared_service, "_buckets", {}), \
+         patch.object(shared_service, "_blocked", {}), \
+         patch("app.api.v1.ai.summarizer.create_summarizer_chain") as mock_chain:
+        # Mock the summarizer chain to avoid real LLM calls
+        # (each request uses distinct content so none is served from cache)
         mock_llm_chain = MagicMock()
         mock_llm_chain.ainvoke.side_effect = [{"text": "Summary 1"}, {"text": "Summary 2"}]
         # Need async mock for ainvoke result
@@ -94,26 +169,158 @@ async def test_rate_limit_endpoint_enforcement(authenticated_client):
         mock_chain.return_value.ainvoke.side_effect = [async_return({"text": "Summary 1"}), async_return({"text": "Summary 2"})]
                  
         # 1. First request - OK
-        response = authenticated_client.post(
+        response = await authenticated_client.post(
             "/api/v1/ai/summarize-thread",
-            json={"content": "This is a test thread content that is long enough."},
+            json={"content": "This is test thread content number 1, long enough."},
         )
         assert response.status_code == status.HTTP_200_OK
         
         # 2. Second request - OK
-        response = authenticated_client.post(
+        response = await authenticated_client.post(
             "/api/v1/ai/summarize-thread",
-            json={"content": "This is a test thread content that is long enough."},
+            json={"content": "This is test thread content number 2, long enough."},
         )
         assert response.status_code == status.HTTP_200_OK
         
         # 3. Third request - Blocked (Limit exceeded)
-        response = authenticated_client.post(
+        response = await authenticated_client.post(
             "/api/v1/ai/summarize-thread",
-            json={"content": "This is a test thread content that is long enough."},
+            json={"content": "This is test thread content number 3, long enough."},
         )
         assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
         assert "limit exceeded" in response.json()["detail"]
+        # A limit of 2 per day regains a request every 12 hours
+        assert 0 < int(response.headers["Retry-After"]) <= 43200
+
+
+class FakeRedis:
+    """Minimal in-memory stand-in for the redis.asyncio commands used."""
+
+    def __init__(self):
+        self.store = {}
+        self.ttls = {}
+        self.gets = 0
+
+    async def get(self, key):
+        self.gets += 1
+        value = self.store.get(key)
+        return None if value is None else str(value).encode()
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self._redis = redis
+        self._commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return None
+
+    def incr(self, key, amount=1):
+        self._commands.append(("incr", key, amount))
+
+    def expire(self, key, seconds):
+        self._commands.append(("expire", key, seconds))
+
+    async def execute(self):
+        results = []
+        for command, key, *args in self._commands:
+            if command == "incr":
+                self._redis.store[key] = self._redis.store.get(key, 0) + args[0]
+                results.append(self._redis.store[key])
+            else:
+                self._redis.ttls[key] = args[0]
+                results.append(True)
+        return results
+
+
+@pytest.fixture
+def redis_rate_limit_service(mock_rate_limit_settings):
+    """Create a Redis-backed rate limit service over a fake client."""
+    fake_redis = FakeRedis()
+    with patch.object(rate_limiter, "aioredis") as mock_aioredis:
+        mock_aioredis.from_url.return_value = fake_redis
+        service = RedisRateLimitService("redis://localhost:6379/0")
+    return service, fake_redis
+
+
+@pytest.mark.asyncio
+async def test_redis_rate_limit_service(redis_rate_limit_service):
+    """Test the Redis limiter counts per user per day and sets an expiry."""
+    service, fake_redis = redis_rate_limit_service
+    user_id = "user1"
+    
+    assert await service.get_remaining_requests(user_id) == 5
+    
+    await service.increment_usage(user_id)
+    assert await service.get_remaining_requests(user_id) == 4
+    
+    await service.increment_usage(user_id, count=4)
+    assert await service.check_limit(user_id) is False
+    assert await service.get_remaining_requests(user_id) == 0
+    assert fake_redis.ttls == {service._key(user_id): 2 * 86400}
+    
+    # A new day uses a fresh counter key
+    with patch("app.services.rate_limiter.time.time", return_value=time.time() + 86400):
+        assert await service.check_limit(user_id) is True
+
+
+@pytest.mark.asyncio
+async def test_redis_rate_limit_retry_after(redis_rate_limit_service):
+    """Test that a blocked Redis user is told to retry at UTC midnight."""
+    service, _ = redis_rate_limit_service
+    user_id = "user1"
+    
+    with patch("app.services.rate_limiter.time.time", return_value=10 * 86400 + 86000):
+        assert await service.get_retry_after_seconds(user_id) == 0
+        
+        await service.increment_usage(user_id, count=5)
+        assert await service.get_retry_after_seconds(user_id) == 400
+
+
+@pytest.mark.asyncio
+async def test_redis_rate_limit_remembers_blocked_users(redis_rate_limit_service):
+    """Test that a user at the limit is rejected without more Redis reads."""
+    service, fake_redis = redis_rate_limit_service
+    user_id = "user1"
+    
+    for _ in range(5):
+        await service.increment_usage(user_id)
+    assert await service.check_limit(user_id) is False
+    reads = fake_redis.gets
+    
+    assert await service.check_limit(user_id) is False
+    assert await service.get_remaining_requests(user_id) == 0
+    assert fake_redis.gets == reads
+    
+    # The block only lasts for the day it was recorded on
+    with patch("app.services.rate_limiter.time.time", return_value=time.time() + 86400):
+        assert await service.check_limit(user_id) is True
+    assert fake_redis.gets == reads + 1
+
+
+def test_create_rate_limit_service_defaults_to_memory(mock_rate_limit_settings):
+    """Test that the in-memory limiter is used when REDIS_URL is unset."""
+    mock_rate_limit_settings.REDIS_URL = ""
+    
+    assert isinstance(rate_limiter._create_rate_limit_service(), RateLimitService)
+
+
+@pytest.mark.asyncio
+async def test_zero_limit_disables_rate_limiting(rate_limit_service, redis_rate_limit_service):
+    """Test that AI_DAILY_RATE_LIMIT=0 lets every request through untracked."""
+    redis_service, fake_redis = redis_rate_limit_service
+    
+    for service in (rate_limit_service, redis_service):
+        service._limit = 0
+        await service.increment_usage("user1")
+        assert await service.check_limit("user1") is True
+        assert await service.get_remaining_requests("user1") == UNLIMITED_REMAINING
     
-    # Clean up overrides
-    app.dependency_overrides = {}
+    assert rate_limit_service._buckets == {}
+    assert fake_redis.store == {}
@@ -1,11 +1,34 @@
 """Tests for video generation endpoints."""
 
+from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
 import pytest
 from fastapi import status
 
-from app.schemas.video import OperationStatus
+from app.api.v1.videos import get_video_service
+from app.schemas.video import (
+    OperationStatus,
+    VideoGenerationResponse,
+    VideoOperationStatusResponse,
+)
+
+# Validated once; stubs return these as-is or derive them with model_copy
+_GENERATION_RESPONSE = VideoGenerationResponse(
+    operation_id="test-op-123",
+    status=OperationStatus.PROCESSING,
+)
+_PROCESSING_STATUS = VideoOperationStatusResponse(
+    operation_id="",
+    done=False,
+    status=OperationStatus.PROCESSING,
+)
+_COMPLETED_STATUS = VideoOperationStatusResponse(
+    operation_id="",
+    done=True,
+    status=OperationStatus.COMPLETED,
+    video_b64="YmFzZTY0X3ZpZGVvX2RhdGE=",  # base64_video_data
+)
 
 
 @pytest.fixture
@@ -18,24 +41,16 @@ def mock_video_service():
 
 
 @pytest.mark.asyncio
-async def test_generate_video_success(authenticated_client):
+async def test_generate_video_success(authenticated_client, override_dependency):
     """Test successful video generation request."""
-    from app.main import app
-    from app.api.v1.videos import get_video_service
-    from app.schemas.video import VideoGenerationResponse
-    
     # Create mock service
-    mock_service = MagicMock()
     async def fake_generate(prompt, config=None):
-        return VideoGenerationResponse(
-            operation_id="test-op-123",
-            status=OperationStatus.PROCESSING,
-        )
-    mock_service.generate_video = fake_generate
+        return _GENERATION_RESPONSE
+    mock_service = SimpleNamespace(generate_video=fake_generate)
     
-    app.dependency_overrides[get_video_service] = lambda: mock_service
+    override_dependency(get_video_service, lambda: mock_service)
     
-    response = authenticated_client.post(
+    response = await authenticated_client.post(
         "/api/v1/ai/videos/generate",
         json={"prompt": "A beautiful sunset over the ocean"},
     )
@@ -44,14 +59,12 @@ async def test_generate_video_success(authenticated_client):
     data = response.json()
     assert data["operation_id"] == "test-op-123"
     assert data["status"] == "processing"
-    
-    app.dependency_overrides = {}
 
 
 @pytest.mark.asyncio
 async def test_generate_video_unauthorized(client):
     """Test unauthorized video generation request."""
-    response = client.post(
+    response = await client.post(
         "/api/v1/ai/videos/generate",
         json={"prompt": "Test prompt"},
     )
@@ -59,27 +72,20 @@ async def test_generate_video_unauthorized(client):
 
 
 @pytest.mark.asyncio
-async def test_generate_video_from_image_success(authenticated_client):
+async def test_generate_video_from_image_success(authenticated_client, override_dependency):
     """Test successful image-to-video generation."""
-    from app.main import app
-    from app.api.v1.videos import get_video_service
-    from app.schemas.video import VideoGenerationResponse
     
-    mock_service = MagicMock()
     async def fake_generate(prompt, image_bytes, config=None):
-        return VideoGenerationResponse(
-            operation_id="test-img-op-456",
-            status=OperationStatus.PROCESSING,
-        )
-    mock_service.generate_video_from_image = fake_generate
+        return _GENERATION_RESPONSE
+    mock_service = SimpleNamespace(generate_video_from_image=fake_generate)
     
-    app.dependency_overrides[get_video_service] = lambda: mock_service
+    override_dependency(get_video_service, lambda: mock_service)
     
     file_content = b"fake_image_data"
     files = {"image": ("test.png", file_content, "image/png")}
     data = {"prompt": "Slow pan across the scene"}
     
-    response = authenticated_client.post(
+    response = await authenticated_client.post(
         "/api/v1/ai/videos/generate-from-image",
         data=data,
         files=files,
@@ -87,9 +93,7 @@ async def test_generate_video_from_image_success(authenticated_client):
     
     assert response.status_code == status.HTTP_200_OK
     data = response.json()
-    assert data["operation_id"] == "test-img-op-456"
-    
-    app.dependency_overrides = {}
+    assert data["operation_id"] == "test-op-123"
 
 
 @pytest.mark.asyncio
@@ -99,7 +103,7 @@ async def test_generate_video_from_image_invalid_type(authenticated_client):
     files = {"image": ("test.txt", file_content, "text/plain")}
     data = {"prompt": "Test prompt"}
     
-    response = authenticated_client.post(
+    response = await authenticated_client.post(
         "/api/v1/ai/videos/generate-from-image",
         data=data,
         files=files,
@@ -109,56 +113,68 @@ async def test_generate_video_from_image_invalid_type(authenticated_client):
 
 
 @pytest.mark.asyncio
-async def test_get_video_status_processing(authenticated_client):
+async def test_generate_video_from_image_config_fields(authenticated_client, override_dependency):
+    """Test that form config fields are validated into the config model."""
+    
+    received = {}
+    async def fake_generate(prompt, image_bytes, config=None):
+        received["config"] = config
+        return _GENERATION_RESPONSE
+    mock_service = SimpleNamespace(generate_video_from_image=fake_generate)
+    
+    override_dependency(get_video_service, lambda: mock_service)
+    
+    files = {"image": ("test.png", b"fake_image_data", "image/png")}
+    
+    response = await authenticated_client.post(
+        "/api/v1/ai/videos/generate-from-image",
+        data={"prompt": "Pan", "aspect_ratio": "9:16", "duration_seconds": "4"},
+        files=files,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert received["config"].aspect_ratio.value == "9:16"
+    assert received["config"].duration_seconds.value == "4"
+    
+    response = await authenticated_client.post(
+        "/api/v1/ai/videos/generate-from-image",
+        data={"prompt": "Pan", "aspect_ratio": "4:3"},
+        files=files,
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_get_video_status_processing(authenticated_client, override_dependency):
     """Test video status check for in-progress operation."""
-    from app.main import app
-    from app.api.v1.videos import get_video_service
-    from app.schemas.video import VideoOperationStatusResponse
     
-    mock_service = MagicMock()
     async def fake_status(operation_id):
-        return VideoOperationStatusResponse(
-            operation_id=operation_id,
-            done=False,
-            status=OperationStatus.PROCESSING,
-        )
-    mock_service.get_operation_status = fake_status
+        return _PROCESSING_STATUS.model_copy(update={"operation_id": operation_id})
+    mock_service = SimpleNamespace(get_operation_status=fake_status)
     
-    app.dependency_overrides[get_video_service] = lambda: mock_service
+    override_dependency(get_video_service, lambda: mock_service)
     
-    response = authenticated_client.get(
-        "/api/v1/ai/videos/status/test-op-123",
+    response = await authenticated_client.get(
+        "/api/v1/ai/videos/status/models/veo-3.1-generate-preview/operations/test-op-123",
     )
     
     assert response.status_code == status.HTTP_200_OK
     data = response.json()
-    assert data["operation_id"] == "test-op-123"
+    assert data["operation_id"] == "models/veo-3.1-generate-preview/operations/test-op-123"
     assert data["done"] is False
     assert data["status"] == "processing"
-    
-    app.dependency_overrides = {}
 
 
 @pytest.mark.asyncio
-async def test_get_video_status_completed(authenticated_client):
+async def test_get_video_status_completed(authenticated_client, override_dependency):
     """Test video status check for completed operation."""
-    from app.main import app
-    from app.api.v1.videos import get_video_service
-    from app.schemas.video import VideoOperationStatusResponse
     
-    mock_service = MagicMock()
     async def fake_status(operation_id):
-        return VideoOperationStatusResponse(
-            operation_id=operation_id,
-            done=True,
-            status=OperationStatus.COMPLETED,
-            video_b64="YmFzZTY0X3ZpZGVvX2RhdGE=",  # base64_video_data
-        )
-    mock_service.get_operation_status = fake_status
+        return _COMPLETED_STATUS.model_copy(update={"operation_id": operation_id})
+    mock_service = SimpleNamespace(get_operation_status=fake_status)
     
-    app.dependency_overrides[get_video_service] = lambda: mock_service
+    override_dependency(get_video_service, lambda: mock_service)
     
-    response = authenticated_client.get(
+    response = await authenticated_client.get(
         "/api/v1/ai/videos/status/completed-op",
     )
     
@@ -167,14 +183,12 @@ async def test_get_video_status_completed(authenticated_client):
     assert data["done"] is True
     assert data["status"] == "completed"
     assert data["video_b64"] is not None
-    
-    app.dependency_overrides = {}
 
 
 @pytest.mark.asyncio
 async def test_get_video_status_unauthorized(client):
     """Test unauthorized status check."""
-    response = client.get(
+    response = await client.get(
         "/api/v1/ai/videos/status/test-op",
     )
     assert response.status_code == status.HTTP_401_UNAUTHORIZED
@@ -1,20 +1,74 @@
 """Pytest configuration and fixtures."""
 
-from typing import Generator
+from typing import Any, AsyncGenerator, Callable, Generator
 
+import httpx
 import pytest
-from fastapi.testclient import TestClient
+import pytest_asyncio
 
+from app.core.firebase import verify_firebase_token
 from app.main import app
+from app.services.response_cache import response_cache
 
 
-@pytest.fixture(scope="session")
-def client() -> Generator[TestClient, None, None]:
-    """Create a test client for the FastAPI app."""
-    with TestClient(app) as test_client:
+def pytest_configure(config: pytest.Config) -> None:
+    """Register custom markers."""
+    config.addinivalue_line(
+        "markers", "slow: tests that call external services (deselect with -m \"not slow\")"
+    )
+
+
+@pytest_asyncio.fixture
+async def client() -> AsyncGenerator[httpx.AsyncClient, None]:
+    """
+    Create an async test client for the FastAPI app.
+
+    Requests are dispatched straight into the app on the test's event loop,
+    without the thread and portal TestClient sets up per request.
+    """
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://testserver"
+    ) as test_client:
         yield test_client
 
 
+@pytest.fixture
+def override_dependency() -> Generator[Callable[[Any, Any], None], None, None]:
+    """
+    Override app dependencies for one test.
+
+    Only the dependencies a test overrides are restored afterwards, even if
+    the test fails, so other overrides are left alone. A dependency that
+    was already overridden gets its previous override back.
+    """
+    missing = object()
+    previous = []
+
+    def override(dependency: Any, replacement: Any) -> None:
+        previous.append(
+            (dependency, app.dependency_overrides.get(dependency, missing))
+        )
+        app.dependency_overrides[dependency] = replacement
+
+    yield override
+
+    # Undo in reverse so overriding the same dependency twice unwinds cleanly
+    for dependency, replacement in reversed(previous):
+        if replacement is missing:
+            app.dependency_overrides.pop(dependency, None)
+        else:
+            app.dependency_overrides[dependency] = replacement
+
+
+@pytest.fixture(autouse=True)
+def clear_response_cache():
+    """Keep cached AI responses from leaking between tests."""
+    response_cache.clear()
+    yield
+    response_cache.clear()
+
+
 @pytest.fixture
 def auth_headers() -> dict[str, str]:
     """
@@ -50,14 +104,10 @@ def mock_user():
 
 
 @pytest.fixture
-def authenticated_client(client, mock_user):
+def authenticated_client(client, mock_user, override_dependency):
     """Client with mocked authentication."""
-    from app.core.firebase import verify_firebase_token
-    from app.main import app
-    
     async def override_verify_token():
         return mock_user
     
-    app.dependency_overrides[verify_firebase_token] = override_verify_token
-    yield client
-    app.dependency_overrides.clear()
+    override_dependency(verify_firebase_token, override_verify_token)
+    return client
@@ -1,5 +1,6 @@
 """Unit tests for Firebase authentication module."""
 
+import time
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -37,7 +38,8 @@ async def test_verify_firebase_token_success(mock_init, mock_verify):
     # Assert
     assert result == expected_user
     mock_verify.assert_called_once_with("valid-token")
-    mock_init.assert_called_once()
+    # Initialization happens at app startup, not per request
+    mock_init.assert_not_called()
 
 
 @pytest.mark.asyncio
@@ -57,3 +59,21 @@ async def test_verify_firebase_token_invalid(mock_init, mock_verify):
     
     assert excinfo.value.status_code == status.HTTP_401_UNAUTHORIZED
     assert excinfo.value.detail == "Invalid or expired token"
+
+
+@pytest.mark.asyncio
+@patch("app.core.firebase.auth.verify_id_token")
+@patch("app.core.firebase.initialize_firebase")
+async def test_verify_firebase_token_cached(mock_init, mock_verify):
+    """Test that a repeated unexpired token is only verified once."""
+    mock_creds = MagicMock(spec=HTTPAuthorizationCredentials)
+    mock_creds.credentials = "cached-token"
+    
+    expected_user = {"uid": "user-123", "exp": time.time() + 3600}
+    mock_verify.return_value = expected_user
+    
+    first = await verify_firebase_token(mock_creds)
+    second = await verify_firebase_token(mock_creds)
+    
+    assert first == second == expected_user
+    mock_verify.assert_called_once_with("cached-token")
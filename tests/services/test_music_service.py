@@ -1,14 +1,31 @@
 """Tests for music service."""
 
+import base64
+from types import SimpleNamespace
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
+from google.genai import types
 
 from app.schemas.music import (
+    DEFAULT_MUSIC_CONFIG,
     MusicGenerationConfig,
+    MusicGenerationMode,
+    MusicGenerationRequest,
     MusicGenerationResponse,
+    MusicScale,
     WeightedPrompt,
 )
+from app.services.music_service import MusicService
+
+# Streamed messages from the mock music session, each carrying one chunk
+_RECEIVED_MESSAGES = [
+    SimpleNamespace(
+        server_content=SimpleNamespace(
+            audio_chunks=[SimpleNamespace(data=b"audio_chunk_data")]
+        )
+    )
+] * 3
 
 
 @pytest.fixture
@@ -27,13 +44,8 @@ def mock_genai_client():
         
         # Mock receive to yield some audio chunks then stop
         async def mock_receive():
-            for _ in range(3):
-                mock_message = MagicMock()
-                mock_message.server_content = MagicMock()
-                mock_message.server_content.audio_chunks = [
-                    MagicMock(data=b"audio_chunk_data")
-                ]
-                yield mock_message
+            for message in _RECEIVED_MESSAGES:
+                yield message
         
         mock_session.receive = mock_receive
         
@@ -54,7 +66,6 @@ def music_service(mock_genai_client):
         mock_settings.GOOGLE_API_KEY = "test-api-key"
         mock_settings.GOOGLE_MUSIC_MODEL = "models/lyria-realtime-exp"
         
-        from app.services.music_service import MusicService
         service = MusicService()
         service.client = mock_genai_client
         return service
@@ -69,13 +80,11 @@ async def test_generate_music_success(music_service):
     ]
     config = MusicGenerationConfig(bpm=120)
     
-    # Mock sleep to speed up test
-    with patch("asyncio.sleep", new_callable=AsyncMock):
-        response = await music_service.generate_music(
-            prompts=prompts,
-            config=config,
-            duration_seconds=5,  # Short duration for test
-        )
+    response = await music_service.generate_music(
+        prompts=prompts,
+        config=config,
+        duration_seconds=5,  # Short duration for test
+    )
     
     assert isinstance(response, MusicGenerationResponse)
     assert response.audio_b64 is not None
@@ -85,25 +94,52 @@ async def test_generate_music_success(music_service):
     assert "minimal techno" in response.prompts_used
 
 
+@pytest.mark.asyncio
+async def test_generate_music_collects_audio_chunks(music_service):
+    """Test that streamed chunks are assembled in order and trimmed."""
+    response = await music_service.generate_music(
+        prompts=[WeightedPrompt(text="lofi", weight=1.0)],
+        duration_seconds=5,
+    )
+    
+    audio = base64.b64decode(response.audio_b64)
+    assert audio == b"audio_chunk_data" * 3
+    assert response.duration_seconds == len(audio) / 192000
+
+
+@pytest.mark.asyncio
+async def test_generate_music_stops_at_requested_duration(music_service, mock_genai_client):
+    """Test that receiving stops once the requested audio has arrived."""
+    # 4 Hz stereo PCM16 is 16 bytes per second, exactly one mock chunk
+    music_service.sample_rate_hz = 4
+    
+    response = await music_service.generate_music(
+        prompts=[WeightedPrompt(text="lofi", weight=1.0)],
+        duration_seconds=1,
+    )
+    
+    assert base64.b64decode(response.audio_b64) == b"audio_chunk_data"
+    assert response.duration_seconds == 1
+    session = mock_genai_client.aio.live.music.connect.return_value.__aenter__.return_value
+    session.stop.assert_awaited_once()
+
+
 @pytest.mark.asyncio
 async def test_generate_music_simple(music_service):
     """Test simplified music generation."""
-    with patch("asyncio.sleep", new_callable=AsyncMock):
-        response = await music_service.generate_music_simple(
-            prompt_text="jazz piano",
-            bpm=90,
-            duration_seconds=5,
-        )
+    response = await music_service.generate_music_simple(
+        prompt_text="jazz piano",
+        bpm=90,
+        duration_seconds=5,
+    )
     
     assert isinstance(response, MusicGenerationResponse)
     assert "jazz piano" in response.prompts_used
 
 
 @pytest.mark.asyncio
-async def test_generate_music_with_all_config_options(music_service):
+async def test_generate_music_with_all_config_options(music_service, mock_genai_client):
     """Test music generation with full configuration."""
-    from app.schemas.music import MusicGenerationMode, MusicScale
-    
     prompts = [WeightedPrompt(text="ambient", weight=1.0)]
     config = MusicGenerationConfig(
         bpm=80,
@@ -116,14 +152,22 @@ async def test_generate_music_with_all_config_options(music_service):
         music_generation_mode=MusicGenerationMode.DIVERSITY,
     )
     
-    with patch("asyncio.sleep", new_callable=AsyncMock):
-        response = await music_service.generate_music(
-            prompts=prompts,
-            config=config,
-            duration_seconds=5,
-        )
+    response = await music_service.generate_music(
+        prompts=prompts,
+        config=config,
+        duration_seconds=5,
+    )
     
     assert isinstance(response, MusicGenerationResponse)
+    
+    session = mock_genai_client.aio.live.music.connect.return_value.__aenter__.return_value
+    music_config = session.set_music_generation_config.call_args.kwargs["config"]
+    assert music_config.bpm == 80
+    assert music_config.density == 0.3
+    assert music_config.brightness == 0.7
+    assert music_config.scale == types.Scale.C_MAJOR_A_MINOR
+    assert music_config.mute_drums is True
+    assert music_config.music_generation_mode == types.MusicGenerationMode.DIVERSITY
 
 
 @pytest.mark.asyncio
@@ -133,7 +177,6 @@ async def test_generate_music_no_client():
         mock_settings.GOOGLE_API_KEY = ""
         mock_settings.GOOGLE_MUSIC_MODEL = "models/lyria-realtime-exp"
         
-        from app.services.music_service import MusicService
         service = MusicService()
         service.client = None
         
@@ -175,3 +218,12 @@ def test_music_generation_config_validation():
     # Density out of range
     with pytest.raises(ValueError):
         MusicGenerationConfig(density=1.5)  # Above 1.0
+
+
+def test_music_generation_request_shares_default_config():
+    """Test that requests without a config share the frozen default."""
+    request = MusicGenerationRequest(prompts=[WeightedPrompt(text="lofi")])
+    assert request.config is DEFAULT_MUSIC_CONFIG
+    
+    with pytest.raises(ValueError):
+        request.config.bpm = 90
@@ -1,8 +1,12 @@
 """Tests for video service."""
 
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
+from google.genai import errors, types
 
 from app.schemas.video import (
     OperationStatus,
@@ -10,6 +14,18 @@ from app.schemas.video import (
     VideoGenerationResponse,
     VideoOperationStatusResponse,
 )
+from app.services.video_service import VideoService
+
+OPERATION_NAME = "models/veo-3.1-generate-preview/operations/test-op"
+
+
+@dataclass
+class FakeOperation:
+    """Plain stand-in for a google-genai video operation."""
+
+    name: str = OPERATION_NAME
+    done: bool = False
+    response: Any = None
 
 
 @pytest.fixture
@@ -28,7 +44,6 @@ def video_service(mock_genai_client):
         mock_settings.GOOGLE_API_KEY = "test-api-key"
         mock_settings.GOOGLE_VIDEO_MODEL = "veo-3.1-generate-preview"
         
-        from app.services.video_service import VideoService
         service = VideoService()
         service.client = mock_genai_client
         return service
@@ -38,8 +53,7 @@ def video_service(mock_genai_client):
 async def test_generate_video_success(video_service, mock_genai_client):
     """Test successful video generation start."""
     # Setup mock operation
-    mock_operation = MagicMock()
-    mock_operation.done = False
+    mock_operation = FakeOperation()
     mock_genai_client.models.generate_videos.return_value = mock_operation
     
     # Call service
@@ -58,8 +72,7 @@ async def test_generate_video_success(video_service, mock_genai_client):
 @pytest.mark.asyncio
 async def test_generate_video_with_config(video_service, mock_genai_client):
     """Test video generation with custom config."""
-    mock_operation = MagicMock()
-    mock_operation.done = False
+    mock_operation = FakeOperation()
     mock_genai_client.models.generate_videos.return_value = mock_operation
     
     config = VideoGenerationConfig(
@@ -82,8 +95,7 @@ async def test_generate_video_with_config(video_service, mock_genai_client):
 @pytest.mark.asyncio
 async def test_generate_video_from_image_success(video_service, mock_genai_client):
     """Test image-to-video generation."""
-    mock_operation = MagicMock()
-    mock_operation.done = False
+    mock_operation = FakeOperation()
     mock_genai_client.models.generate_videos.return_value = mock_operation
     
     response = await video_service.generate_video_from_image(
@@ -101,10 +113,9 @@ async def test_generate_video_from_image_success(video_service, mock_genai_clien
 async def test_get_operation_status_processing(video_service, mock_genai_client):
     """Test status check for in-progress operation."""
     # First start an operation
-    mock_operation = MagicMock()
-    mock_operation.done = False
+    mock_operation = FakeOperation()
     mock_genai_client.models.generate_videos.return_value = mock_operation
-    mock_genai_client.operations.get.return_value = mock_operation
+    mock_genai_client.aio.operations.get = AsyncMock(return_value=mock_operation)
     
     gen_response = await video_service.generate_video(
         prompt="Test",
@@ -119,15 +130,68 @@ async def test_get_operation_status_processing(video_service, mock_genai_client)
 
 
 @pytest.mark.asyncio
-async def test_get_operation_status_not_found(video_service):
+async def test_get_operation_status_completed(video_service, mock_genai_client):
+    """Test that a finished operation is downloaded via the async client."""
+    generated_video = SimpleNamespace(video="files/test-video")
+    mock_operation = FakeOperation(
+        done=True,
+        response=SimpleNamespace(generated_videos=[generated_video]),
+    )
+    mock_genai_client.models.generate_videos.return_value = mock_operation
+    mock_genai_client.aio.operations.get = AsyncMock(return_value=mock_operation)
+    mock_genai_client.aio.files.download = AsyncMock(return_value=b"video_data")
+    
+    gen_response = await video_service.generate_video(prompt="Test")
+    status = await video_service.get_operation_status(gen_response.operation_id)
+    
+    assert status.done is True
+    assert status.status == OperationStatus.COMPLETED
+    assert status.video_b64 == "dmlkZW9fZGF0YQ=="
+    mock_genai_client.aio.files.download.assert_awaited_once_with(
+        file="files/test-video"
+    )
+    mock_genai_client.files.download.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_operation_status_not_found(video_service, mock_genai_client):
     """Test status check for non-existent operation."""
-    status = await video_service.get_operation_status("non-existent-id")
+    mock_genai_client.aio.operations.get = AsyncMock(
+        side_effect=errors.ClientError(404, {"error": {"message": "not found"}})
+    )
+    
+    status = await video_service.get_operation_status(
+        "models/veo-3.1-generate-preview/operations/non-existent-id"
+    )
     
     assert status.done is False
     assert status.status == OperationStatus.FAILED
     assert "not found" in status.error_message.lower()
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "operation_id",
+    [
+        "files/x",
+        "non-existent-id",
+        "models/other-model/operations/test-op",
+        "models/veo-3.1-generate-preview/operations/test-op/../../files/x",
+    ],
+)
+async def test_get_operation_status_rejects_foreign_names(
+    video_service, mock_genai_client, operation_id
+):
+    """Test that IDs outside this model's operations never reach the SDK."""
+    mock_genai_client.aio.operations.get = AsyncMock()
+    
+    status = await video_service.get_operation_status(operation_id)
+    
+    assert status.status == OperationStatus.FAILED
+    assert status.error_message == "Operation not found"
+    mock_genai_client.aio.operations.get.assert_not_called()
+
+
 @pytest.mark.asyncio
 async def test_generate_video_no_client():
     """Test error when client is not initialized."""
@@ -135,9 +199,47 @@ async def test_generate_video_no_client():
         mock_settings.GOOGLE_API_KEY = ""
         mock_settings.GOOGLE_VIDEO_MODEL = "veo-3.1-generate-preview"
         
-        from app.services.video_service import VideoService
         service = VideoService()
         service.client = None
         
         with pytest.raises(RuntimeError, match="not initialized"):
             await service.generate_video(prompt="Test")
+
+
+@pytest.mark.asyncio
+async def test_operation_id_is_resource_name(video_service, mock_genai_client):
+    """Test that operations are polled by Google resource name, statelessly."""
+    mock_operation = FakeOperation()
+    mock_genai_client.models.generate_videos.return_value = mock_operation
+    mock_genai_client.aio.operations.get = AsyncMock(return_value=mock_operation)
+    
+    gen_response = await video_service.generate_video(prompt="Test")
+    assert gen_response.operation_id == OPERATION_NAME
+    
+    # Another worker's service instance can answer the poll
+    other_service = VideoService.__new__(VideoService)
+    other_service.client = mock_genai_client
+    other_service.model_name = video_service.model_name
+    status = await other_service.get_operation_status(OPERATION_NAME)
+    
+    assert status.status == OperationStatus.PROCESSING
+    polled = mock_genai_client.aio.operations.get.await_args.args[0]
+    assert isinstance(polled, types.GenerateVideosOperation)
+    assert polled.name == OPERATION_NAME
+
+
+@pytest.mark.asyncio
+async def test_generate_video_sync_backs_off(video_service, mock_genai_client):
+    """Test that sync generation polls with capped exponential backoff."""
+    mock_operation = FakeOperation()
+    mock_genai_client.models.generate_videos.return_value = mock_operation
+    mock_genai_client.aio.operations.get = AsyncMock(return_value=mock_operation)
+    
+    with patch("asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+        with pytest.raises(TimeoutError):
+            await video_service.generate_video_sync(
+                prompt="Test", timeout_seconds=30, poll_interval=10
+            )
+    
+    delays = [call.args[0] for call in mock_sleep.await_args_list]
+    assert delays == [2, 4, 8, 10, 10]